@@ -1,19 +1,37 @@
 import os
+import re
 import json
+import csv
 import base64
+import hashlib
+import mimetypes
 import logging
 from datetime import datetime, timedelta
-from functools import wraps
+from collections import OrderedDict
+from functools import wraps, partial
 from decimal import Decimal
-from flask import Flask, render_template, request, redirect, url_for, flash, jsonify, session
+from flask import Flask, render_template, request, redirect, url_for, flash, jsonify, session, Response, g, abort, send_file, stream_with_context, has_request_context, before_render_template, template_rendered
 from flask_sqlalchemy import SQLAlchemy
-from sqlalchemy import func, or_
+from sqlalchemy import func, or_, inspect, bindparam, event
+from sqlalchemy.engine import Engine
 from sqlalchemy.exc import OperationalError, ProgrammingError
+from sqlalchemy.orm import Session as OrmSession
+from werkzeug.local import LocalProxy
 from werkzeug.utils import secure_filename
 from werkzeug.security import generate_password_hash, check_password_hash
-from PIL import Image
+from PIL import Image, ImageOps
+import numpy as np
 import io
+import sqlite3
 import secrets
+import tempfile
+import click
+import atexit
+import queue
+import signal
+import socket
+import threading
+import time
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -58,6 +76,37 @@ app.config['UPLOAD_FOLDER'] = 'static/uploads'
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
 app.config['PERMANENT_SESSION_LIFETIME'] = timedelta(hours=8)  # 8-hour sessions
 
+# SQLite (development / μικρές εγκαταστάσεις): WAL ώστε οι αναγνώσεις να μη μπλοκάρουν τον writer και
+# busy timeout ώστε οι ταυτόχρονοι writers (gunicorn workers/threads) να περιμένουν αντί για "database is locked"
+app.config.setdefault('SQLITE_PRAGMAS', {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',  # Ασφαλές με WAL: fsync μόνο στα checkpoints
+    'busy_timeout': int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 30000)),
+    'mmap_size': int(os.environ.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024)),
+    'cache_size': -int(os.environ.get('SQLITE_CACHE_SIZE_KB', 64000)),  # Αρνητική τιμή = KiB
+    'temp_store': 'MEMORY',
+})
+
+# PostgreSQL: pool ανά process, ρυθμίσιμο από το environment (WEB_CONCURRENCY x pool <= max_connections)
+if app.config['SQLALCHEMY_DATABASE_URI'].startswith('postgresql'):
+    app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', {
+        'pool_size': int(os.environ.get('DB_POOL_SIZE', 10)),
+        'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW', 10)),
+        'pool_timeout': int(os.environ.get('DB_POOL_TIMEOUT', 30)),
+        'pool_recycle': int(os.environ.get('DB_POOL_RECYCLE', 1800)),  # Πριν κλείσει ο proxy/PgBouncer τις idle συνδέσεις
+        'pool_pre_ping': os.environ.get('DB_POOL_PRE_PING', '1') == '1',
+    })
+
+@event.listens_for(Engine, 'connect')
+def _configure_sqlite_connection(dbapi_connection, connection_record):
+    """PRAGMAs του SQLITE_PRAGMAS σε κάθε νέα σύνδεση SQLite (εφαρμογή, CLI, migrations)"""
+    if not isinstance(dbapi_connection, sqlite3.Connection):
+        return
+    cursor = dbapi_connection.cursor()
+    for name, value in app.config['SQLITE_PRAGMAS'].items():
+        cursor.execute(f'PRAGMA {name} = {value}')
+    cursor.close()
+
 # Allowed file extensions for security
 ALLOWED_EXTENSIONS = {'jpg', 'jpeg', 'png', 'gif', 'pdf'}
 
@@ -126,6 +175,11 @@ class User(db.Model):
 
 class Message(db.Model):
     """Πίνακας Μηνυμάτων"""
+    __table_args__ = (
+        db.Index('ix_message_sender_id_created_at', 'sender_id', 'created_at'),
+        db.Index('ix_message_sender_id_id', 'sender_id', 'id'),
+    )
+    
     id = db.Column(db.Integer, primary_key=True)
     sender_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     subject = db.Column(db.String(200), nullable=False)
@@ -138,6 +192,12 @@ class Message(db.Model):
 
 class MessageRecipient(db.Model):
     """Πίνακας Παραληπτών Μηνυμάτων"""
+    __table_args__ = (
+        db.Index('ix_message_recipient_recipient_id_is_read', 'recipient_id', 'is_read'),
+        db.Index('ix_message_recipient_message_id', 'message_id'),
+        db.Index('ix_message_recipient_recipient_id_id', 'recipient_id', 'id'),
+    )
+    
     id = db.Column(db.Integer, primary_key=True)
     message_id = db.Column(db.Integer, db.ForeignKey('message.id'), nullable=False)
     recipient_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
@@ -146,6 +206,10 @@ class MessageRecipient(db.Model):
 
 class DynamicField(db.Model):
     """Πίνακας Δυναμικών Πεδίων (χρώματα, τύποι οχημάτων)"""
+    __table_args__ = (
+        db.Index('ix_dynamic_field_field_type_is_active', 'field_type', 'is_active'),
+    )
+    
     id = db.Column(db.Integer, primary_key=True)
     field_type = db.Column(db.String(50), nullable=False)  # 'vehicle_color' or 'vehicle_type'
     value = db.Column(db.String(100), nullable=False)
@@ -216,10 +280,17 @@ class ViolationsData(db.Model):
 
 class Violation(db.Model):
     """Πίνακας Παραβάσεων"""
+    __table_args__ = (
+        db.Index('ix_violation_officer_id_violation_date', 'officer_id', 'violation_date'),
+        db.Index('ix_violation_violation_date', 'violation_date'),
+        db.Index('ix_violation_created_at', 'created_at'),
+    )
+    
     id = db.Column(db.Integer, primary_key=True)
     
     # Στοιχεία Οχήματος
     license_plate = db.Column(db.String(20), nullable=False)
+    plate_key = db.Column(db.String(20), nullable=True, index=True)  # Κανονικοποιημένη πινακίδα για αναζήτηση
     vehicle_brand = db.Column(db.String(50), nullable=False)
     vehicle_color = db.Column(db.String(50), nullable=False)
     vehicle_type = db.Column(db.String(20), nullable=False)
@@ -244,24 +315,35 @@ class Violation(db.Model):
     driver_first_name = db.Column(db.String(50), nullable=True)
     driver_father_name = db.Column(db.String(50), nullable=True)
     driver_afm = db.Column(db.String(20), nullable=True)
-    driver_signature = db.Column(db.Text, nullable=True)  # Base64 encoded signature
+    # Οι βαριές στήλες (ομάδα 'details') φορτώνονται μόνο όταν χρειάζονται (deferred)
+    driver_signature = db.deferred(db.Column(db.Text, nullable=True))  # Παλιό base64 PNG - μεταφέρεται στο blob store
+    driver_signature_key = db.Column(db.String(80), nullable=True)  # Κλειδί συμπιεσμένης υπογραφής στο blob store
     
     # Προστίμα και Άρθρα
-    violation_articles = db.Column(db.Text, nullable=True)  # JSON string με άρθρα
+    violation_articles = db.deferred(db.Column(db.Text, nullable=True), group='details')  # JSON string με άρθρα
     total_fine_amount = db.Column(db.Numeric(8,2), nullable=True)  # Συνολικό ποσό προστίμου
-    fine_breakdown = db.Column(db.Text, nullable=True)  # JSON string με ανάλυση προστίμων
+    fine_breakdown = db.deferred(db.Column(db.Text, nullable=True), group='details')  # JSON string με ανάλυση προστίμων
     
     # Μεταδεδομένα
     officer_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    # Κανονικοποιημένες γραμμές παραβάσεων (μία ανά επιλεγμένο τύπο) για indexed aggregates
+    items = db.relationship('ViolationItem', backref='violation', lazy=True, cascade='all, delete-orphan',
+                            order_by='ViolationItem.id')
+    
     def get_selected_violations_list(self):
-        """Επιστρέφει τις επιλεγμένες παραβάσεις ως λίστα"""
+        """Επιστρέφει τις επιλεγμένες παραβάσεις ως λίστα (το JSON αναλύεται μία φορά ανά τιμή)"""
+        cached = getattr(self, '_selected_violations_cache', None)
+        if cached is not None and cached[0] == self.selected_violations:
+            return cached[1]
         try:
-            return json.loads(self.selected_violations)
+            parsed = json.loads(self.selected_violations)
         except (json.JSONDecodeError, TypeError, ValueError):
-            return []
+            parsed = []
+        self._selected_violations_cache = (self.selected_violations, parsed)
+        return parsed
     
     def get_violation_articles_list(self):
         """Επιστρέφει τα άρθρα παραβάσεων ως λίστα"""
@@ -298,14 +380,119 @@ class Violation(db.Model):
         return "0.00€"
     
     def get_violation_data_by_id(self, violation_id):
-        """Επιστρέφει τα στοιχεία παράβασης βάσει ID"""
+        """Επιστρέφει τα στοιχεία παράβασης βάσει ID
+        
+        Όλες οι επιλεγμένες παραβάσεις φορτώνονται με ένα query την πρώτη φορά
+        (ή νωρίτερα για πολλές παραβάσεις μαζί μέσω prefetch_violation_data).
+        """
         try:
-            return ViolationsData.query.get(int(violation_id))
-        except (ValueError, AttributeError):
+            violation_id = int(violation_id)
+        except (ValueError, TypeError):
             return None
+        if getattr(self, '_violation_data_cache', None) is None:
+            prefetch_violation_data([self])
+        return self._violation_data_cache.get(violation_id)
+
+def prefetch_violation_data(violations):
+    """Φόρτωση των ViolationsData όλων των επιλεγμένων παραβάσεων με ένα IN query"""
+    wanted = {}
+    for violation in violations:
+        ids = set()
+        for violation_id in violation.get_selected_violations_list():
+            try:
+                ids.add(int(violation_id))
+            except (ValueError, TypeError):
+                continue
+        wanted[violation] = ids
+    
+    all_ids = set().union(*wanted.values()) if wanted else set()
+    by_id = {vd.id: vd for vd in ViolationsData.query.filter(ViolationsData.id.in_(all_ids))} if all_ids else {}
+    for violation, ids in wanted.items():
+        violation._violation_data_cache = {vd_id: by_id[vd_id] for vd_id in ids if vd_id in by_id}
+
+def officer_summary():
+    """Eager load του αστυνομικού μιας παράβασης με τις στήλες που εμφανίζονται στα templates"""
+    return db.joinedload(Violation.officer).load_only(User.rank, User.first_name, User.last_name)
+
+def violation_list_columns():
+    """Projection για σελίδες λίστας: μόνο οι στήλες που εμφανίζονται (χωρίς υπογραφή/JSON αναλύσεις)"""
+    return db.load_only(
+        Violation.id, Violation.license_plate, Violation.vehicle_brand, Violation.vehicle_color,
+        Violation.vehicle_type, Violation.violation_date, Violation.violation_time, Violation.street,
+        Violation.street_number, Violation.selected_violations, Violation.plates_removed,
+        Violation.license_removed, Violation.registration_removed, Violation.photo_filename,
+        Violation.total_fine_amount, Violation.officer_id, Violation.created_at, Violation.updated_at
+    )
+
+class ViolationItem(db.Model):
+    """Πίνακας Γραμμών Παράβασης: ένας τύπος παράβασης ανά έκθεση με το πρόστιμο και το άρθρο της στιγμής"""
+    __tablename__ = 'violation_item'
+    __table_args__ = (
+        db.Index('ix_violation_item_data_violation', 'violations_data_id', 'violation_id'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    violation_id = db.Column(db.Integer, db.ForeignKey('violation.id', ondelete='CASCADE'), nullable=False, index=True)
+    violations_data_id = db.Column(db.Integer, db.ForeignKey('violations_data.id', ondelete='SET NULL'), nullable=True)
+    fine_amount = db.Column(db.Numeric(8,2), nullable=False, default=0)
+    article = db.Column(db.String(60), nullable=True, index=True)  # π.χ. "7 παρ. 2"
+
+class MessageSyncState(db.Model):
+    """Watermark ανά χρήστη: το τελευταίο message_id που έχει ελεγχθεί για ειδοποιήσεις"""
+    __tablename__ = 'message_sync_state'
+    
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    last_message_id = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class UserCounter(db.Model):
+    """Μετρητές αδιάβαστων ανά χρήστη (συντηρούνται στο ίδιο transaction με τις αλλαγές)"""
+    __tablename__ = 'user_counter'
+    
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    unread_messages = db.Column(db.Integer, nullable=False, default=0)
+    unread_notifications = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class Job(db.Model):
+    """Ουρά εργασιών παρασκηνίου (notifications, φωτογραφίες, rollup) - εκτελούνται από `flask worker`"""
+    __tablename__ = 'job'
+    __table_args__ = (
+        db.Index('ix_job_status_run_after_id', 'status', 'run_after', 'id'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    task = db.Column(db.String(60), nullable=False)
+    payload = db.Column(db.Text, nullable=False, default='{}')  # JSON με τα ορίσματα του handler
+    status = db.Column(db.String(20), nullable=False, default='pending')  # 'pending', 'running', 'done', 'failed'
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    run_after = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    locked_at = db.Column(db.DateTime)
+    locked_by = db.Column(db.String(120))
+    last_error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    finished_at = db.Column(db.DateTime)
+
+class ViolationDailyStats(db.Model):
+    """Rollup παραβάσεων ανά ημέρα και αστυνομικό (συντηρείται από submit/update_violation)"""
+    __tablename__ = 'violation_daily_stats'
+    
+    stat_date = db.Column(db.Date, primary_key=True)
+    officer_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True, index=True)
+    violations_count = db.Column(db.Integer, nullable=False, default=0)
+    with_photos_count = db.Column(db.Integer, nullable=False, default=0)
+    plates_removed_count = db.Column(db.Integer, nullable=False, default=0)
+    removals_count = db.Column(db.Integer, nullable=False, default=0)  # Πινακίδες, άδεια ή κυκλοφορία
+    total_fine = db.Column(db.Numeric(12,2), nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
 class Notification(db.Model):
     """Πίνακας Ειδοποιήσεων"""
+    __table_args__ = (
+        db.Index('ix_notification_user_id_is_read_created_at', 'user_id', 'is_read', 'created_at'),
+        db.Index('ix_notification_user_id_related_message_id', 'user_id', 'related_message_id'),
+    )
+    
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     title = db.Column(db.String(200), nullable=False)
@@ -344,6 +531,78 @@ class Notification(db.Model):
         return classes.get(self.type, 'alert-info')
 
 
+# ======================== REQUEST IDENTITY ========================
+
+# Πόσο συχνά (δευτερόλεπτα) ελέγχεται το marker αρχείο για αλλαγές χρηστών από άλλους workers
+app.config.setdefault('IDENTITY_VERSION_CHECK_INTERVAL', 2)
+# Μέγιστη ηλικία (δευτερόλεπτα) του snapshot ρόλου στο session: μετά ξαναδιαβάζεται από τη βάση. Το marker
+# είναι τοπικό αρχείο (ανά host) και το αγγίζουν μόνο αλλαγές μέσω της εφαρμογής - αλλαγές απευθείας στη βάση
+# ή σε άλλον host φαίνονται το αργότερο μετά από αυτό το διάστημα
+app.config.setdefault('IDENTITY_SNAPSHOT_MAX_AGE', int(os.environ.get('IDENTITY_SNAPSHOT_MAX_AGE', 60)))
+
+_identity_version_cache = {'stamp': None, 'checked_at': 0.0}
+
+def _identity_marker_path():
+    """Αρχείο-σημάδι: η αλλαγή του ακυρώνει τα snapshots ρόλων σε όλα τα sessions και workers του ίδιου host"""
+    return os.path.join(app.instance_path, 'identity.version')
+
+def identity_version():
+    """Τρέχουσα έκδοση στοιχείων χρηστών (mtime του marker)"""
+    now = time.monotonic()
+    cache = _identity_version_cache
+    if cache['stamp'] is None or now - cache['checked_at'] >= app.config['IDENTITY_VERSION_CHECK_INTERVAL']:
+        try:
+            stamp = os.stat(_identity_marker_path()).st_mtime_ns
+        except OSError:
+            stamp = 0
+        cache['stamp'] = stamp
+        cache['checked_at'] = now
+    return cache['stamp']
+
+def invalidate_identity_snapshots():
+    """Καλείται μετά από κάθε αλλαγή χρήστη (ρόλος, κατάσταση, στοιχεία)"""
+    try:
+        os.makedirs(app.instance_path, exist_ok=True)
+        with open(_identity_marker_path(), 'a'):
+            os.utime(_identity_marker_path(), None)
+    except OSError as e:
+        logger.warning(f"Αδυναμία ενημέρωσης identity marker: {str(e)}")
+    _identity_version_cache['stamp'] = None
+
+def store_identity_snapshot(user):
+    """Αποθήκευση ρόλου/κατάστασης του χρήστη στο session μαζί με την τρέχουσα έκδοση"""
+    session['user_role'] = user.role
+    session['full_name'] = user.full_name
+    session['identity'] = {
+        'role': user.role, 'active': bool(user.is_active), 'v': identity_version(), 'checked_at': time.time()
+    }
+
+def get_current_user():
+    """Ο συνδεδεμένος χρήστης - φορτώνεται μία φορά ανά request και κρατιέται στο g"""
+    if 'user_id' not in session:
+        return None
+    if '_current_user' not in g:
+        g._current_user = db.session.get(User, session['user_id'])
+    return g._current_user
+
+def current_identity():
+    """Snapshot ρόλου από το session χωρίς πρόσβαση στη βάση, εκτός αν άλλαξε η έκδοση ή έληξε το snapshot"""
+    snapshot = session.get('identity')
+    if (snapshot is None or snapshot.get('v') != identity_version()
+            or time.time() - snapshot.get('checked_at', 0) >= app.config['IDENTITY_SNAPSHOT_MAX_AGE']):
+        user = get_current_user()
+        if user is None:
+            session.pop('identity', None)
+            return None
+        store_identity_snapshot(user)
+        snapshot = session['identity']
+    return snapshot
+
+@app.context_processor
+def inject_current_user():
+    # Lazy: ο χρήστης φορτώνεται μόνο αν το template χρησιμοποιήσει το current_user
+    return {'current_user': LocalProxy(get_current_user)}
+
 # ======================== AUTHENTICATION DECORATORS ========================
 
 def login_required(f):
@@ -362,28 +621,1535 @@ def admin_required(f):
             flash('Παρακαλώ συνδεθείτε για να συνεχίσετε.', 'warning')
             return redirect(url_for('login'))
         
-        user = User.query.get(session['user_id'])
-        if not user or not user.can_view_admin_dashboard():
+        identity = current_identity()
+        if not identity or not identity['active'] or identity['role'] not in ['admin', 'poweruser']:
+            flash('Δεν έχετε δικαίωμα πρόσβασης σε αυτή τη σελίδα.', 'danger')
+            return redirect(url_for('dashboard'))
+        return f(*args, **kwargs)
+    return decorated_function
+
+def poweruser_required(f):
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if 'user_id' not in session:
+            flash('Παρακαλώ συνδεθείτε για να συνεχίσετε.', 'warning')
+            return redirect(url_for('login'))
+        
+        identity = current_identity()
+        if not identity or not identity['active'] or identity['role'] not in ['admin', 'poweruser']:
             flash('Δεν έχετε δικαίωμα πρόσβασης σε αυτή τη σελίδα.', 'danger')
             return redirect(url_for('dashboard'))
         return f(*args, **kwargs)
     return decorated_function
 
-def poweruser_required(f):
-    @wraps(f)
-    def decorated_function(*args, **kwargs):
-        if 'user_id' not in session:
-            flash('Παρακαλώ συνδεθείτε για να συνεχίσετε.', 'warning')
-            return redirect(url_for('login'))
-        
-        user = User.query.get(session['user_id'])
-        if not user or user.role not in ['admin', 'poweruser']:
-            flash('Δεν έχετε δικαίωμα πρόσβασης σε αυτή τη σελίδα.', 'danger')
-            return redirect(url_for('dashboard'))
-        return f(*args, **kwargs)
-    return decorated_function
 
 
+# ======================== METRICS ========================
+
+# Prometheus σε multiprocess mode μόνο όταν ορίζεται PROMETHEUS_MULTIPROC_DIR (gunicorn.conf.py): κάθε worker
+# γράφει σε αρχεία του κοινού καταλόγου και το /metrics τα αθροίζει. Χωρίς αυτό (flask run, worker, CLI)
+# τα metrics είναι μόνο του τρέχοντος process. Το env διαβάζεται κατά το import του prometheus_client
+app.config.setdefault('METRICS_DIR', os.environ.get('PROMETHEUS_MULTIPROC_DIR'))
+app.config.setdefault('METRICS_TOKEN', os.environ.get('METRICS_TOKEN'))  # Αν οριστεί: Authorization: Bearer <token>
+if app.config['METRICS_DIR']:
+    os.makedirs(app.config['METRICS_DIR'], exist_ok=True)
+    os.environ['PROMETHEUS_MULTIPROC_DIR'] = app.config['METRICS_DIR']
+
+from prometheus_client import REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, CONTENT_TYPE_LATEST, generate_latest, multiprocess
+from prometheus_client.core import GaugeMetricFamily
+
+@atexit.register
+def _mark_metrics_process_dead():
+    """Αφαίρεση των livesum gauges του process κατά την έξοδο (στο gunicorn το κάνει και το child_exit)"""
+    if app.config['METRICS_DIR']:
+        multiprocess.mark_process_dead(os.getpid(), path=app.config['METRICS_DIR'])
+
+request_latency = Histogram(
+    'http_request_duration_seconds', 'Διάρκεια requests ανά endpoint, μέθοδο και status',
+    ['endpoint', 'method', 'status'],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+)
+violations_submitted = Counter('violations_submitted_total', 'Παραβάσεις που καταχωρήθηκαν')
+cache_requests = Counter('cache_requests_total', 'Προσβάσεις στις in-process caches', ['cache', 'result'])
+db_pool_checkouts = Counter('db_pool_checkouts_total', 'Δανεισμοί συνδέσεων από το pool της βάσης')
+db_pool_checked_out = Gauge('db_pool_checked_out', 'Συνδέσεις σε χρήση', multiprocess_mode='livesum')
+db_pool_overflow = Gauge('db_pool_overflow', 'Συνδέσεις πέρα από το pool_size', multiprocess_mode='livesum')
+
+def record_cache_access(cache_name, hit):
+    cache_requests.labels(cache_name, 'hit' if hit else 'miss').inc()
+
+with app.app_context():
+    _metrics_engine = db.engine
+
+def _observe_pool():
+    pool = _metrics_engine.pool  # Νέο αντικείμενο μετά από engine.dispose()
+    if hasattr(pool, 'overflow'):
+        db_pool_checked_out.set(pool.checkedout())
+        db_pool_overflow.set(max(pool.overflow(), 0))
+
+@event.listens_for(_metrics_engine, 'checkout')
+def _pool_checkout(dbapi_connection, connection_record, connection_proxy):
+    db_pool_checkouts.inc()
+    _observe_pool()
+
+@event.listens_for(_metrics_engine, 'checkin')
+def _pool_checkin(dbapi_connection, connection_record):
+    _observe_pool()
+
+class JobQueueCollector:
+    """Βάθος της ουράς jobs - υπολογίζεται από τη βάση τη στιγμή του scrape"""
+    
+    def collect(self):
+        depth = GaugeMetricFamily('job_queue_depth', 'Jobs ανά κατάσταση', labels=['status'])
+        oldest = GaugeMetricFamily('job_queue_oldest_pending_seconds', 'Ηλικία του παλαιότερου εκκρεμούς job')
+        try:
+            counts = dict(db.session.execute(
+                db.select(Job.status, func.count(Job.id)).where(Job.status != 'done').group_by(Job.status)
+            ).all())
+            oldest_created = db.session.execute(
+                db.select(func.min(Job.created_at)).where(Job.status == 'pending')
+            ).scalar()
+        except (OperationalError, ProgrammingError) as e:
+            db.session.rollback()
+            logger.warning(f"Αδυναμία ανάγνωσης της ουράς jobs για τα metrics: {str(e)}")
+            return
+        for status in ('pending', 'running', 'failed'):
+            depth.add_metric([status], counts.get(status, 0))
+        oldest.add_metric([], (datetime.utcnow() - oldest_created).total_seconds() if oldest_created else 0)
+        yield depth
+        yield oldest
+
+@app.before_request
+def _start_request_timer():
+    g._request_started = time.perf_counter()
+
+@app.after_request
+def _observe_request_latency(response):
+    started = g.get('_request_started')
+    if started is not None:
+        request_latency.labels(
+            request.endpoint or 'unmatched', request.method, str(response.status_code)
+        ).observe(time.perf_counter() - started)
+    return response
+
+@app.route('/metrics')
+def metrics():
+    """Prometheus metrics όλων των workers (multiprocess) και της ουράς jobs"""
+    token = app.config['METRICS_TOKEN']
+    if token and not secrets.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'):
+        abort(401)
+    registry = CollectorRegistry()
+    if app.config['METRICS_DIR']:
+        multiprocess.MultiProcessCollector(registry, path=app.config['METRICS_DIR'])
+    else:
+        registry.register(REGISTRY)
+    registry.register(JobQueueCollector())
+    return Response(generate_latest(registry), mimetype=CONTENT_TYPE_LATEST)
+
+# ======================== IN-MEMORY CACHES ========================
+
+class LRUTTLCache:
+    """Μικρή thread-safe LRU cache με χρόνο λήξης εγγραφών (ανά process)"""
+    
+    def __init__(self, maxsize=256, ttl=60, name=None):
+        self.maxsize = maxsize
+        self.name = name  # Όνομα στα metrics (cache_requests_total)
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is not None and item[1] < time.monotonic():
+                del self._data[key]
+                item = None
+            if item is not None:
+                self._data.move_to_end(key)
+        if self.name:
+            record_cache_access(self.name, item is not None)
+        return item[0] if item is not None else None
+    
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+    
+    def discard_where(self, predicate):
+        """Αφαίρεση όλων των κλειδιών για τα οποία το predicate(key) είναι True"""
+        with self._lock:
+            for key in [k for k in self._data if predicate(k)]:
+                del self._data[key]
+    
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+# ======================== PLATE SEARCH ========================
+
+PLATE_FTS_TABLE = 'violation_plate_fts'
+
+_plate_fts_state = {'available': None}
+
+def normalize_plate(license_plate):
+    """Κανονικοποίηση πινακίδας: μόνο γράμματα/αριθμοί, κεφαλαία (π.χ. 'ικα-1234' -> 'ΙΚΑ1234')"""
+    return re.sub(r'[^\w\u0370-\u03FF]', '', license_plate or '').upper()
+
+def plate_fts_available():
+    """Έλεγχος (μία φορά ανά process) αν υπάρχει ο FTS5 trigram πίνακας πινακίδων στη SQLite"""
+    if _plate_fts_state['available'] is None:
+        if db.engine.dialect.name == 'sqlite':
+            _plate_fts_state['available'] = inspect(db.engine).has_table(PLATE_FTS_TABLE)
+        else:
+            _plate_fts_state['available'] = False
+    return _plate_fts_state['available']
+
+def plate_search_filter(plate_key, prefix=False):
+    """Φίλτρο αναζήτησης (substring) πάνω στη στήλη plate_key
+    
+    - PostgreSQL: LIKE '%X%' μέσω του pg_trgm GIN index
+    - SQLite: FTS5 trigram (>= 3 χαρακτήρες), αλλιώς LIKE '%X%' όπως η αρχική αναζήτηση
+    - prefix=True: μόνο πινακίδες που ξεκινούν με X, ως range στο B-tree index
+    """
+    if prefix:
+        # Range αντί για LIKE 'X%' ώστε να χρησιμοποιείται το ix_violation_plate_key
+        return db.and_(Violation.plate_key >= plate_key, Violation.plate_key < plate_key + '\U0010ffff')
+    
+    if db.engine.dialect.name != 'postgresql' and len(plate_key) >= 3 and plate_fts_available():
+        return db.text(
+            f"violation.id IN (SELECT rowid FROM {PLATE_FTS_TABLE} WHERE {PLATE_FTS_TABLE} MATCH :plate_match)"
+        ).bindparams(plate_match=f'"{plate_key}"')
+    
+    return Violation.plate_key.like(f'%{plate_key}%')
+
+# Cache πρόσφατων αναζητήσεων πινακίδας για το /api/search_license_plate
+app.config.setdefault('PLATE_LOOKUP_CACHE_SIZE', 512)
+app.config.setdefault('PLATE_LOOKUP_CACHE_TTL', 60)
+plate_lookup_cache = LRUTTLCache(
+    maxsize=app.config['PLATE_LOOKUP_CACHE_SIZE'],
+    ttl=app.config['PLATE_LOOKUP_CACHE_TTL'],
+    name='plate_lookup'
+)
+
+def invalidate_plate_lookups(*plate_keys):
+    """Ακύρωση cached αναζητήσεων που ταιριάζουν (substring) με τις δοσμένες πινακίδες"""
+    plate_keys = [key for key in plate_keys if key]
+    if plate_keys:
+        plate_lookup_cache.discard_where(lambda cached: any(cached in key for key in plate_keys))
+
+def backfill_plate_keys(batch_size=1000):
+    """Συμπλήρωση plate_key για υπάρχουσες παραβάσεις σε batches. Επιστρέφει το πλήθος γραμμών"""
+    violation_table = Violation.__table__
+    update_stmt = violation_table.update()\
+        .where(violation_table.c.id == bindparam('_id'))\
+        .values(plate_key=bindparam('_plate_key'), updated_at=violation_table.c.updated_at)
+    
+    last_id = 0
+    updated = 0
+    while True:
+        rows = db.session.execute(
+            db.select(violation_table.c.id, violation_table.c.license_plate)
+                .where(violation_table.c.id > last_id)
+                .order_by(violation_table.c.id)
+                .limit(batch_size)
+        ).all()
+        if not rows:
+            break
+        
+        db.session.execute(update_stmt, [
+            {'_id': row.id, '_plate_key': normalize_plate(row.license_plate)} for row in rows
+        ])
+        db.session.commit()
+        last_id = rows[-1].id
+        updated += len(rows)
+    
+    return updated
+
+# ======================== FINE TARIFF CACHE ========================
+
+# Κατηγορίες οχημάτων για τον υπολογισμό προστίμων στο submit_violation
+VEHICLE_CLASS_MAP = {
+    'αυτοκίνητο': 'car', 'αυτοκινητο': 'car', 'car': 'car', 'automobile': 'car',
+    'μοτοσικλέτα': 'motorcycle', 'μοτοσικλετα': 'motorcycle', 'motorcycle': 'motorcycle', 'bike': 'motorcycle',
+    'φορτηγό': 'truck', 'φορτηγο': 'truck', 'truck': 'truck',
+}
+
+# Πόσο συχνά (δευτερόλεπτα) ελέγχεται το marker αρχείο για αλλαγές από άλλους workers
+app.config.setdefault('FINE_TARIFF_CHECK_INTERVAL', 5)
+
+_fine_tariff_lock = threading.Lock()
+_fine_tariff_version = 0
+_fine_tariff_cache = {'version': None, 'checked_at': 0.0, 'table': {}}
+
+def _fine_tariff_marker_path():
+    """Αρχείο-σημάδι ώστε η ακύρωση να φτάνει και στους υπόλοιπους gunicorn workers"""
+    return os.path.join(app.instance_path, 'fine_tariff.version')
+
+def _fine_tariff_marker_stamp():
+    try:
+        return os.stat(_fine_tariff_marker_path()).st_mtime_ns
+    except OSError:
+        return 0
+
+def vehicle_class(vehicle_type):
+    """Επιστρέφει την κατηγορία προστίμου ('car', 'motorcycle', 'truck') για τον τύπο οχήματος"""
+    return VEHICLE_CLASS_MAP.get((vehicle_type or '').lower(), 'car')
+
+def _build_tariff_entry(violation_data):
+    """Προϋπολογισμός άρθρου και προστίμων ανά κατηγορία οχήματος για ένα ViolationsData"""
+    fine_cars = float(violation_data.fine_cars) if violation_data.fine_cars else 0.0
+    
+    if violation_data.fine_motorcycles:
+        fine_motorcycles = float(violation_data.fine_motorcycles)
+        # Έλεγχος για μισό πρόστιμο
+        if violation_data.half_fine_motorcycles:
+            fine_motorcycles = fine_motorcycles / 2
+    else:
+        fine_motorcycles = fine_cars  # Fallback στο πρόστιμο αυτοκινήτου
+    
+    fine_trucks = float(violation_data.fine_trucks) if violation_data.fine_trucks else fine_cars
+    
+    article_text = None
+    if violation_data.article and violation_data.article.strip():
+        article_text = violation_data.article.strip()
+        if violation_data.article_paragraph and violation_data.article_paragraph.strip():
+            article_text += f" παρ. {violation_data.article_paragraph.strip()}"
+    
+    return {
+        'article': article_text,
+        'fines': {'car': fine_cars, 'motorcycle': fine_motorcycles, 'truck': fine_trucks}
+    }
+
+def invalidate_fine_tariff():
+    """Ακύρωση του πίνακα προστίμων - καλείται μετά από κάθε αλλαγή σε ViolationsData"""
+    global _fine_tariff_version
+    with _fine_tariff_lock:
+        _fine_tariff_version += 1
+        _fine_tariff_cache['checked_at'] = 0.0
+    try:
+        os.makedirs(app.instance_path, exist_ok=True)
+        with open(_fine_tariff_marker_path(), 'a'):
+            os.utime(_fine_tariff_marker_path(), None)
+    except OSError as e:
+        logger.warning(f"Αδυναμία ενημέρωσης fine tariff marker: {str(e)}")
+
+def get_fine_tariff():
+    """Επιστρέφει τον πίνακα προστίμων {violations_data.id: entry}, φορτώνοντάς τον μόνο όταν αλλάξει η έκδοση"""
+    now = time.monotonic()
+    cache = _fine_tariff_cache
+    if cache['version'] is not None and now - cache['checked_at'] < app.config['FINE_TARIFF_CHECK_INTERVAL']:
+        record_cache_access('fine_tariff', True)
+        return cache['table']
+    
+    with _fine_tariff_lock:
+        version = (_fine_tariff_version, _fine_tariff_marker_stamp())
+        record_cache_access('fine_tariff', cache['version'] == version)
+        if cache['version'] != version:
+            cache['table'] = {vd.id: _build_tariff_entry(vd) for vd in ViolationsData.query.all()}
+            cache['version'] = version
+        cache['checked_at'] = now
+        return cache['table']
+
+def calculate_fines(selected_violations, vehicle_type):
+    """Υπολογισμός άρθρων, συνολικού ποσού και γραμμών (ViolationItem) για τις επιλεγμένες παραβάσεις"""
+    tariff = get_fine_tariff()
+    klass = vehicle_class(vehicle_type)
+    total_fine = 0
+    violation_articles_list = []
+    items = []
+    
+    for violation_id in selected_violations:
+        try:
+            violations_data_id = int(violation_id)
+        except (ValueError, TypeError) as e:
+            logger.warning(f"Error processing violation {violation_id}: {str(e)}")
+            continue
+        entry = tariff.get(violations_data_id)
+        if entry:
+            if entry['article']:
+                violation_articles_list.append(entry['article'])
+            total_fine += entry['fines'][klass]
+            items.append(ViolationItem(
+                violations_data_id=violations_data_id,
+                fine_amount=Decimal(str(entry['fines'][klass])),
+                article=entry['article']
+            ))
+    
+    return total_fine, violation_articles_list, items
+
+def violation_item_aggregates(group_by='article', start_date=None, end_date=None, officer_id=None,
+                              violations_data_id=None, limit=None):
+    """Πλήθος και σύνολο προστίμων ανά άρθρο ('article') ή τύπο παράβασης ('type') με ένα GROUP BY
+    
+    Επιστρέφει λίστα dict {'key', 'label', 'count', 'total_fine'} ταξινομημένη κατά πλήθος.
+    """
+    count = func.count(ViolationItem.id)
+    total = func.coalesce(func.sum(ViolationItem.fine_amount), 0)
+    if group_by == 'type':
+        query = db.session.query(ViolationItem.violations_data_id, ViolationsData.description, count, total)\
+            .outerjoin(ViolationsData, ViolationsData.id == ViolationItem.violations_data_id)\
+            .group_by(ViolationItem.violations_data_id, ViolationsData.description)
+    else:
+        query = db.session.query(ViolationItem.article, ViolationItem.article, count, total)\
+            .group_by(ViolationItem.article)
+    if violations_data_id:
+        query = query.filter(ViolationItem.violations_data_id == violations_data_id)
+    
+    if start_date or end_date or officer_id:
+        query = query.join(Violation, Violation.id == ViolationItem.violation_id)
+        if start_date:
+            query = query.filter(Violation.violation_date >= start_date)
+        if end_date:
+            query = query.filter(Violation.violation_date <= end_date)
+        if officer_id:
+            query = query.filter(Violation.officer_id == officer_id)
+    
+    query = query.order_by(count.desc())
+    if limit:
+        query = query.limit(limit)
+    return [
+        {'key': key, 'label': label or 'Χωρίς άρθρο', 'count': int(row_count), 'total_fine': float(row_total)}
+        for key, label, row_count, row_total in query.all()
+    ]
+
+
+# ======================== JOB QUEUE ========================
+
+app.config.setdefault('JOB_POLL_INTERVAL', 1.0)
+app.config.setdefault('JOB_BATCH_SIZE', 10)
+app.config.setdefault('JOB_MAX_ATTEMPTS', 5)
+app.config.setdefault('JOB_RETRY_DELAY', 10)  # Δευτερόλεπτα, διπλασιάζεται σε κάθε αποτυχία
+app.config.setdefault('JOB_LOCK_TIMEOUT', 600)  # Jobs 'running' για περισσότερο θεωρούνται ορφανά (crash worker)
+app.config.setdefault('JOB_KEEP_DAYS', 7)  # Πόσο κρατάμε τα ολοκληρωμένα jobs
+# Worker thread μέσα σε κάθε web process. 0 όταν τρέχει ξεχωριστό `flask worker` (π.χ. worker γραμμή στο Procfile)
+app.config.setdefault('JOB_WORKER_EMBEDDED', os.environ.get('JOB_WORKER_EMBEDDED', '1') == '1')
+
+JOB_TASKS = {}
+job_wakeup = threading.Event()
+_embedded_worker = None
+_embedded_worker_lock = threading.Lock()
+
+def job_task(name):
+    """Καταχώρηση συνάρτησης ως handler των jobs `name`"""
+    def decorator(fn):
+        JOB_TASKS[name] = fn
+        return fn
+    return decorator
+
+def after_commit(callback):
+    """Εκτέλεση του callback μόνο μετά το επιτυχές commit του τρέχοντος transaction (π.χ. SSE events)"""
+    db.session.info.setdefault('after_commit', []).append(callback)
+
+@event.listens_for(OrmSession, 'after_commit')
+def _run_after_commit_callbacks(session):
+    for callback in session.info.pop('after_commit', ()):
+        try:
+            callback()
+        except Exception as e:
+            logger.warning(f"Σφάλμα σε after_commit callback: {str(e)}")
+
+@event.listens_for(OrmSession, 'after_rollback')
+def _discard_after_commit_callbacks(session):
+    session.info.pop('after_commit', None)
+
+def enqueue_job(task, delay=None, **payload):
+    """Προσθήκη job στο τρέχον transaction (χωρίς commit) - εκτελείται μόνο αν γίνει commit"""
+    if task not in JOB_TASKS:
+        raise ValueError(f"Άγνωστος τύπος job: {task}")
+    db.session.add(Job(
+        task=task,
+        payload=json.dumps(payload),
+        run_after=datetime.utcnow() + timedelta(seconds=delay or 0)
+    ))
+    after_commit(job_wakeup.set)
+
+def claim_jobs(worker_id, limit):
+    """Ατομική δέσμευση έως `limit` εκτελέσιμων jobs
+    
+    PostgreSQL: FOR UPDATE SKIP LOCKED ώστε πολλοί workers να μη δεσμεύουν τα ίδια jobs.
+    SQLite: το UPDATE ... RETURNING είναι ήδη σειριακό (ένας writer) και τρέχει ένας μόνο worker.
+    """
+    now = datetime.utcnow()
+    orphaned = now - timedelta(seconds=app.config['JOB_LOCK_TIMEOUT'])
+    runnable = db.select(Job.id).where(or_(
+        (Job.status == 'pending') & (Job.run_after <= now),
+        (Job.status == 'running') & (Job.locked_at < orphaned)
+    )).order_by(Job.id).limit(limit)
+    if db.engine.dialect.name == 'postgresql':
+        runnable = runnable.with_for_update(skip_locked=True)
+    
+    claimed = db.session.execute(
+        db.update(Job)
+            .where(Job.id.in_(runnable.scalar_subquery()))
+            .values(status='running', locked_at=now, locked_by=worker_id, attempts=Job.attempts + 1)
+            .returning(Job.id, Job.task, Job.payload, Job.attempts)
+            .execution_options(synchronize_session=False)
+    ).all()
+    db.session.commit()
+    return sorted(claimed, key=lambda job: job.id)
+
+def run_job(job, worker_id):
+    """Εκτέλεση ενός δεσμευμένου job. Επιστρέφει True αν ολοκληρώθηκε"""
+    try:
+        handler = JOB_TASKS.get(job.task)
+        if handler is None:
+            raise LookupError(f"Άγνωστος τύπος job: {job.task}")
+        # Πρώτα ο handler και μετά το 'done' στο ίδιο transaction: είτε και τα δύο είτε κανένα. Στην SQLite το
+        # write lock κρατιέται μόνο από την πρώτη εγγραφή ως το commit, όχι κατά την επεξεργασία αρχείων (φωτογραφίες)
+        handler(**json.loads(job.payload))
+        owned = db.session.execute(
+            db.update(Job)
+                .where(Job.id == job.id, Job.locked_by == worker_id)
+                .values(status='done', finished_at=datetime.utcnow(), last_error=None)
+                .execution_options(synchronize_session=False)
+        ).rowcount
+        if owned != 1:
+            # Το job ξαναδεσμεύτηκε ως ορφανό (JOB_LOCK_TIMEOUT) από άλλον worker - οι αλλαγές του δεν εφαρμόζονται δύο φορές
+            db.session.rollback()
+            logger.warning(f"Job #{job.id} ({job.task}) δεσμεύτηκε από άλλον worker - οι αλλαγές του απορρίπτονται")
+            return False
+        db.session.commit()
+        return True
+    except Exception as e:
+        db.session.rollback()
+        failed = job.attempts >= app.config['JOB_MAX_ATTEMPTS']
+        retry_delay = min(app.config['JOB_RETRY_DELAY'] * 2 ** (job.attempts - 1), 3600)
+        db.session.execute(
+            db.update(Job)
+                .where(Job.id == job.id, Job.locked_by == worker_id)
+                .values(
+                    status='failed' if failed else 'pending',
+                    run_after=datetime.utcnow() + timedelta(seconds=retry_delay),
+                    locked_at=None,
+                    locked_by=None,
+                    last_error=str(e)[:2000]
+                )
+                .execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+        logger.warning(f"Job #{job.id} ({job.task}) απέτυχε (προσπάθεια {job.attempts}): {str(e)}")
+        return False
+
+def purge_finished_jobs():
+    """Διαγραφή ολοκληρωμένων jobs παλαιότερων από JOB_KEEP_DAYS (τα 'failed' μένουν για διερεύνηση)"""
+    cutoff = datetime.utcnow() - timedelta(days=app.config['JOB_KEEP_DAYS'])
+    deleted = db.session.execute(
+        db.delete(Job).where(Job.status == 'done', Job.finished_at < cutoff)
+    ).rowcount
+    db.session.commit()
+    return deleted
+
+def _job_worker_lock(blocking):
+    """SQLite: αποκλειστικό lock αρχείου ώστε να τρέχει ένας μόνο worker (single writer). None αν το κρατά άλλος"""
+    import fcntl
+    os.makedirs(app.instance_path, exist_ok=True)
+    handle = open(os.path.join(app.instance_path, 'job-worker.lock'), 'w')
+    try:
+        fcntl.flock(handle, fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+    except OSError:
+        handle.close()
+        return None
+    return handle
+
+def work_jobs(worker_id, stop_when_idle=False, stop_event=None):
+    """Κύριος βρόχος worker: δέσμευση και εκτέλεση jobs. Επιστρέφει το πλήθος που ολοκληρώθηκαν"""
+    processed = 0
+    last_purge = 0
+    while stop_event is None or not stop_event.is_set():
+        job_wakeup.clear()
+        try:
+            if time.monotonic() - last_purge > 3600:
+                purge_finished_jobs()
+                last_purge = time.monotonic()
+            claimed = claim_jobs(worker_id, app.config['JOB_BATCH_SIZE'])
+            for job in claimed:
+                processed += run_job(job, worker_id)
+        except (OperationalError, ProgrammingError) as e:
+            db.session.rollback()
+            logger.warning(f"Σφάλμα βάσης στον job worker: {str(e)}")
+            claimed = []
+            time.sleep(app.config['JOB_POLL_INTERVAL'] * 10)
+        finally:
+            db.session.remove()
+        
+        if not claimed:
+            if stop_when_idle:
+                break
+            job_wakeup.wait(app.config['JOB_POLL_INTERVAL'])
+    return processed
+
+def job_worker_id(kind):
+    return f'{socket.gethostname()}:{os.getpid()}:{kind}'
+
+def _embedded_worker_loop():
+    worker_id = job_worker_id('embedded')
+    with app.app_context():
+        while True:
+            lock = None
+            if db.engine.dialect.name == 'sqlite':
+                lock = _job_worker_lock(blocking=False)
+                if lock is None:
+                    # Τρέχει ήδη άλλος worker (άλλο process ή `flask worker`) - ξαναδοκιμάζουμε αργότερα
+                    time.sleep(app.config['JOB_POLL_INTERVAL'] * 30)
+                    continue
+            try:
+                work_jobs(worker_id)
+            except Exception as e:
+                logger.warning(f"Ο embedded job worker σταμάτησε: {str(e)}")
+                time.sleep(app.config['JOB_POLL_INTERVAL'] * 10)
+            finally:
+                if lock is not None:
+                    lock.close()
+
+@app.before_request
+def _start_embedded_job_worker():
+    global _embedded_worker
+    if not app.config['JOB_WORKER_EMBEDDED'] or (_embedded_worker is not None and _embedded_worker.is_alive()):
+        return
+    with _embedded_worker_lock:
+        if _embedded_worker is None or not _embedded_worker.is_alive():
+            _embedded_worker = threading.Thread(target=_embedded_worker_loop, name='job-worker', daemon=True)
+            _embedded_worker.start()
+
+# ======================== DAILY STATISTICS ========================
+
+DAILY_STATS_COUNTERS = ('violations_count', 'with_photos_count', 'plates_removed_count', 'removals_count', 'total_fine')
+
+def violation_stats_contribution(violation):
+    """Η συνεισφορά μιας παράβασης στο rollup: (ημερομηνία, αστυνομικός, μετρητές)"""
+    return (violation.violation_date, violation.officer_id, {
+        'violations_count': 1,
+        'with_photos_count': 1 if violation.photo_filename is not None else 0,
+        'plates_removed_count': 1 if violation.plates_removed else 0,
+        'removals_count': 1 if (violation.plates_removed or violation.license_removed or violation.registration_removed) else 0,
+        'total_fine': Decimal(str(violation.total_fine_amount or 0)),
+    })
+
+def dialect_insert(table):
+    """INSERT με υποστήριξη ON CONFLICT για την τρέχουσα βάση (PostgreSQL ή SQLite)"""
+    if db.engine.dialect.name == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert(table)
+
+def _daily_stats_upsert(stat_date, officer_id, delta):
+    """Atomic INSERT ... ON CONFLICT DO UPDATE αύξηση των μετρητών μιας γραμμής rollup"""
+    table = ViolationDailyStats.__table__
+    stmt = dialect_insert(table).values(
+        stat_date=stat_date, officer_id=officer_id, updated_at=datetime.utcnow(), **delta
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.stat_date, table.c.officer_id],
+        set_=dict(
+            {name: table.c[name] + stmt.excluded[name] for name in DAILY_STATS_COUNTERS},
+            updated_at=stmt.excluded.updated_at
+        )
+    )
+    db.session.execute(stmt)
+
+def apply_daily_stats(new=None, old=None):
+    """Ενημέρωση του rollup στο τρέχον transaction. new/old: αποτέλεσμα του violation_stats_contribution"""
+    deltas = {}
+    for contribution, sign in ((old, -1), (new, 1)):
+        if contribution is None:
+            continue
+        stat_date, officer_id, counters = contribution
+        delta = deltas.setdefault((stat_date, officer_id), dict.fromkeys(DAILY_STATS_COUNTERS, 0))
+        for name, value in counters.items():
+            delta[name] += sign * value
+    
+    for (stat_date, officer_id), delta in deltas.items():
+        if any(delta.values()):
+            _daily_stats_upsert(stat_date, officer_id, delta)
+
+def _contribution_to_json(contribution):
+    if contribution is None:
+        return None
+    stat_date, officer_id, counters = contribution
+    return [stat_date.isoformat(), officer_id, {name: str(value) for name, value in counters.items()}]
+
+def _contribution_from_json(data):
+    if data is None:
+        return None
+    stat_date, officer_id, counters = data
+    return (datetime.fromisoformat(stat_date).date(), officer_id, {
+        name: Decimal(value) if name == 'total_fine' else int(value) for name, value in counters.items()
+    })
+
+def enqueue_daily_stats(new=None, old=None):
+    """Ενημέρωση του rollup από τον job worker - το job γράφεται στο ίδιο transaction με την παράβαση"""
+    if new != old:
+        enqueue_job('daily_stats', new=_contribution_to_json(new), old=_contribution_to_json(old))
+
+@job_task('daily_stats')
+def daily_stats_job(new=None, old=None):
+    apply_daily_stats(new=_contribution_from_json(new), old=_contribution_from_json(old))
+
+def daily_stats_rebuild_statements():
+    """DELETE + INSERT ... SELECT που ξαναχτίζουν το rollup από τον πίνακα violation"""
+    removal = or_(Violation.plates_removed == True, Violation.license_removed == True, Violation.registration_removed == True)
+    aggregate = db.select(
+        Violation.violation_date,
+        Violation.officer_id,
+        func.count(Violation.id),
+        func.sum(db.case((Violation.photo_filename != None, 1), else_=0)),
+        func.sum(db.case((Violation.plates_removed == True, 1), else_=0)),
+        func.sum(db.case((removal, 1), else_=0)),
+        func.coalesce(func.sum(Violation.total_fine_amount), 0),
+        func.max(func.coalesce(Violation.updated_at, Violation.created_at)),
+    ).group_by(Violation.violation_date, Violation.officer_id)
+    
+    table = ViolationDailyStats.__table__
+    return [
+        table.delete(),
+        table.insert().from_select(['stat_date', 'officer_id', *DAILY_STATS_COUNTERS, 'updated_at'], aggregate)
+    ]
+
+def rebuild_daily_stats():
+    """Πλήρης ανακατασκευή του rollup από τον πίνακα violation. Επιστρέφει το πλήθος γραμμών"""
+    ViolationDailyStats.__table__.create(db.engine, checkfirst=True)
+    for statement in daily_stats_rebuild_statements():
+        db.session.execute(statement)
+    db.session.commit()
+    return db.session.query(func.count()).select_from(ViolationDailyStats.__table__).scalar()
+
+def violation_count_from_rollup(officer_id=None, start_date=None, end_date=None):
+    """Πλήθος παραβάσεων από το rollup (αντί για COUNT(*) στον πίνακα violation)"""
+    query = db.session.query(func.coalesce(func.sum(ViolationDailyStats.violations_count), 0))
+    if officer_id:
+        query = query.filter(ViolationDailyStats.officer_id == officer_id)
+    if start_date:
+        query = query.filter(ViolationDailyStats.stat_date >= start_date)
+    if end_date:
+        query = query.filter(ViolationDailyStats.stat_date <= end_date)
+    return int(query.scalar())
+
+def violation_stats_summary(officer_id=None):
+    """Όλα τα στατιστικά παραβάσεων των dashboards σε ένα query πάνω στο rollup"""
+    today = datetime.now().date()
+    month_start = today.replace(day=1)
+    stats = ViolationDailyStats
+    
+    def total_where(condition, column=stats.violations_count):
+        return func.coalesce(func.sum(db.case((condition, column), else_=0)), 0)
+    
+    row = db.session.query(
+        func.coalesce(func.sum(stats.violations_count), 0),
+        total_where(stats.officer_id == officer_id),
+        total_where(stats.stat_date == today),
+        total_where(stats.stat_date >= month_start),
+        func.coalesce(func.sum(stats.with_photos_count), 0),
+        func.coalesce(func.sum(stats.plates_removed_count), 0),
+        func.coalesce(func.sum(stats.removals_count), 0),
+    ).one()
+    
+    return {
+        'total_violations': int(row[0]),
+        'my_violations': int(row[1]),
+        'today_violations': int(row[2]),
+        'month_violations': int(row[3]),
+        'with_photos': int(row[4]),
+        'with_plates_removed': int(row[5]),
+        'with_removals': int(row[6]),
+    }
+
+
+# ======================== UNREAD COUNTERS ========================
+
+UNREAD_COUNTERS = ('unread_messages', 'unread_notifications')
+
+def adjust_unread_counters(user_ids, messages=0, notifications=0):
+    """Atomic αύξηση/μείωση των μετρητών αδιάβαστων στο τρέχον transaction (χωρίς commit)"""
+    if not user_ids or not (messages or notifications):
+        return
+    table = UserCounter.__table__
+    stmt = dialect_insert(table)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.user_id],
+        set_=dict(
+            {name: table.c[name] + stmt.excluded[name] for name in UNREAD_COUNTERS},
+            updated_at=stmt.excluded.updated_at
+        )
+    )
+    now = datetime.utcnow()
+    db.session.execute(stmt, [
+        {'user_id': user_id, 'unread_messages': messages, 'unread_notifications': notifications, 'updated_at': now}
+        for user_id in user_ids
+    ])
+
+def unread_counts(user_id):
+    """(αδιάβαστα μηνύματα, αδιάβαστες ειδοποιήσεις) με ανάγνωση ενός primary key"""
+    row = db.session.execute(
+        db.select(UserCounter.unread_messages, UserCounter.unread_notifications)
+            .where(UserCounter.user_id == user_id)
+    ).first()
+    return (max(row[0], 0), max(row[1], 0)) if row else (0, 0)
+
+def unread_counter_rebuild_statements():
+    """DELETE + INSERT ... SELECT που ξαναχτίζουν τους μετρητές από τα message_recipient/notification"""
+    unread_messages = db.select(func.count(MessageRecipient.id))\
+        .where(MessageRecipient.recipient_id == User.id, MessageRecipient.is_read == False)\
+        .correlate(User).scalar_subquery()
+    unread_notifications = db.select(func.count(Notification.id))\
+        .where(Notification.user_id == User.id, Notification.is_read == False)\
+        .correlate(User).scalar_subquery()
+    counts = db.select(User.id, unread_messages, unread_notifications, db.literal(datetime.utcnow()))
+    
+    table = UserCounter.__table__
+    return [
+        table.delete(),
+        table.insert().from_select(['user_id', *UNREAD_COUNTERS, 'updated_at'], counts)
+    ]
+
+def reconcile_unread_counters():
+    """Επιδιόρθωση απόκλισης των μετρητών. Επιστρέφει το πλήθος χρηστών με λάθος τιμές"""
+    UserCounter.__table__.create(db.engine, checkfirst=True)
+    stored = {row.user_id: (row.unread_messages, row.unread_notifications)
+              for row in db.session.execute(db.select(UserCounter.__table__))}
+    for statement in unread_counter_rebuild_statements():
+        db.session.execute(statement)
+    fresh = {row.user_id: (row.unread_messages, row.unread_notifications)
+             for row in db.session.execute(db.select(UserCounter.__table__))}
+    db.session.commit()
+    return sum(1 for user_id, counts in fresh.items() if stored.get(user_id, (0, 0)) != counts)
+
+# ======================== BLOB STORE ========================
+
+# Content-addressed αποθήκευση αρχείων (φωτογραφίες, υπογραφές). Το 'local' backend γράφει σε
+# κοινόχρηστο κατάλογο (π.χ. NFS mount) και στέκεται στη θέση ενός object storage
+app.config.setdefault('BLOB_STORE', os.environ.get('BLOB_STORE', 'local'))
+app.config.setdefault('BLOB_STORE_ROOT', os.environ.get('BLOB_STORE_ROOT', os.path.join(app.instance_path, 'blobs')))
+app.config.setdefault('BLOB_MAX_AGE', 365 * 24 * 3600)
+
+BLOB_KEY_PATTERN = re.compile(r'^[0-9a-f]{64}(\.[a-z0-9]+)+$')
+BLOB_CHUNK_SIZE = 64 * 1024   # Πολλαπλάσιο του 4 ώστε κάθε κομμάτι base64 να αποκωδικοποιείται αυτόνομα
+
+class LocalBlobStore:
+    """Blob store σε τοπικό/κοινόχρηστο δίσκο: <root>/ab/cd/<sha256><suffix>
+    
+    Το κλειδί κάθε αρχείου είναι το SHA-256 του περιεχομένου του, οπότε τα διπλότυπα
+    αποθηκεύονται μία φορά και ένα κλειδί δεν αλλάζει ποτέ περιεχόμενο.
+    """
+    
+    def __init__(self, root):
+        self.root = root
+    
+    @staticmethod
+    def is_valid_key(key):
+        return bool(key and BLOB_KEY_PATTERN.match(key))
+    
+    def path(self, key):
+        return os.path.join(self.root, key[:2], key[2:4], key)
+    
+    def exists(self, key):
+        return os.path.exists(self.path(key))
+    
+    def open(self, key):
+        return open(self.path(key), 'rb')
+    
+    def _staging_file(self):
+        staging_dir = os.path.join(self.root, 'tmp')
+        os.makedirs(staging_dir, exist_ok=True)
+        return os.path.join(staging_dir, f'{secrets.token_hex(16)}.part')
+    
+    def _commit(self, staging_path, key):
+        final_path = self.path(key)
+        if os.path.exists(final_path):
+            os.remove(staging_path)  # Το ίδιο περιεχόμενο υπάρχει ήδη
+        else:
+            os.makedirs(os.path.dirname(final_path), exist_ok=True)
+            os.replace(staging_path, final_path)
+    
+    def put_stream(self, chunks, suffix='', validate=None):
+        """Εγγραφή ροής bytes με υπολογισμό SHA-256 στο πέρασμα. Επιστρέφει το κλειδί
+        
+        Το validate(path) ελέγχει το προσωρινό αρχείο πριν γίνει ορατό: σηκώνει εξαίρεση
+        για απόρριψη ή επιστρέφει την κατάληξη του κλειδιού (π.χ. από τη μορφή που ανίχνευσε).
+        """
+        staging_path = self._staging_file()
+        digest = hashlib.sha256()
+        try:
+            with open(staging_path, 'wb') as f:
+                for chunk in chunks:
+                    digest.update(chunk)
+                    f.write(chunk)
+                f.flush()
+                os.fsync(f.fileno())
+            if validate:
+                suffix = validate(staging_path) or suffix
+            key = f'{digest.hexdigest()}{suffix}'
+            self._commit(staging_path, key)
+            return key
+        except BaseException:
+            if os.path.exists(staging_path):
+                os.remove(staging_path)
+            raise
+    
+    def put_bytes(self, data, suffix=''):
+        return self.put_stream([data], suffix)
+    
+    def write_derived(self, key, data):
+        """Εγγραφή αρχείου που προκύπτει ντετερμινιστικά από άλλο blob (π.χ. thumbnail)"""
+        staging_path = self._staging_file()
+        with open(staging_path, 'wb') as f:
+            f.write(data)
+        self._commit(staging_path, key)
+    
+    def delete(self, key):
+        try:
+            os.remove(self.path(key))
+        except FileNotFoundError:
+            pass
+
+BLOB_STORE_BACKENDS = {'local': LocalBlobStore}
+blob_store = BLOB_STORE_BACKENDS[app.config['BLOB_STORE']](app.config['BLOB_STORE_ROOT'])
+
+# ======================== PHOTO PIPELINE ========================
+
+app.config.setdefault('PHOTO_MAX_DIMENSION', 2560)      # Μέγιστη πλευρά (px) της εκδοχής προβολής
+app.config.setdefault('PHOTO_THUMBNAIL_SIZE', 320)
+app.config.setdefault('PHOTO_WEBP_QUALITY', 80)
+app.config.setdefault('PHOTO_MAX_PIXELS', 50_000_000)   # Προστασία από decompression bombs
+
+PHOTO_FORMATS = {'JPEG': '.jpg', 'PNG': '.png', 'GIF': '.gif', 'WEBP': '.webp'}
+PHOTO_VARIANTS = ('display', 'thumb')
+
+class PhotoError(ValueError):
+    """Μη έγκυρη ή κατεστραμμένη εικόνα (φωτογραφία ή υπογραφή)"""
+
+def upload_path(*parts):
+    """Απόλυτη διαδρομή μέσα στο UPLOAD_FOLDER (φωτογραφίες πριν το blob store)"""
+    return os.path.join(app.root_path, app.config['UPLOAD_FOLDER'], *parts)
+
+def photo_variant_key(key, variant):
+    """Κλειδί της εκδοχής WebP ('display' ή 'thumb') μιας φωτογραφίας"""
+    return f"{key.split('.', 1)[0]}.{variant}.webp"
+
+def _base64_chunks(data_url):
+    """Σταδιακή αποκωδικοποίηση data URL (canvas.toDataURL) χωρίς δεύτερο αντίγραφο όλου του αρχείου"""
+    start = data_url.find(',') + 1 if data_url.startswith('data:') else 0
+    for offset in range(start, len(data_url), BLOB_CHUNK_SIZE):
+        try:
+            yield base64.b64decode(data_url[offset:offset + BLOB_CHUNK_SIZE], validate=True)
+        except ValueError:
+            raise PhotoError('Η φωτογραφία της κάμερας δεν είναι έγκυρη.')
+
+def _file_chunks(stream):
+    return iter(lambda: stream.read(BLOB_CHUNK_SIZE), b'')
+
+def _validate_photo(path):
+    """Έλεγχος με Pillow πριν την αποθήκευση. Επιστρέφει την κατάληξη βάσει της πραγματικής μορφής"""
+    try:
+        with Image.open(path) as img:
+            image_format = img.format
+            width, height = img.size
+            img.verify()
+    except Exception:
+        raise PhotoError('Το αρχείο δεν είναι έγκυρη εικόνα.')
+    if image_format not in PHOTO_FORMATS:
+        raise PhotoError('Μη υποστηριζόμενη μορφή εικόνας.')
+    if width * height > app.config['PHOTO_MAX_PIXELS']:
+        raise PhotoError('Η ανάλυση της εικόνας είναι υπερβολικά μεγάλη.')
+    return PHOTO_FORMATS[image_format]
+
+def save_violation_photo(photo_file=None, photo_data=None):
+    """Αποθήκευση της φωτογραφίας της φόρμας (αρχείο ή λήψη κάμερας). Επιστρέφει το κλειδί ή None"""
+    if photo_file and photo_file.filename:
+        if not allowed_file(photo_file.filename):
+            raise PhotoError('Μη επιτρεπόμενος τύπος αρχείου φωτογραφίας.')
+        return blob_store.put_stream(_file_chunks(photo_file.stream), validate=_validate_photo)
+    if photo_data:
+        return blob_store.put_stream(_base64_chunks(photo_data), validate=_validate_photo)
+    return None
+
+def _encode_webp(img, quality):
+    buffer = io.BytesIO()
+    img.save(buffer, 'WEBP', quality=quality, method=4)
+    return buffer.getvalue()
+
+def process_violation_photo(key, max_dimension, thumbnail_size, webp_quality):
+    """Δημιουργία εκδοχής προβολής (με όριο ανάλυσης και σωστό προσανατολισμό) και thumbnail σε WebP
+    
+    Εκτελείται από τον job worker - τα σφάλματα διαδίδονται ώστε το job να ξαναδοκιμαστεί.
+    Το πρωτότυπο μένει αναλλοίωτο αφού το κλειδί του είναι το hash του.
+    """
+    with blob_store.open(key) as f, Image.open(f) as source:
+        # JPEG: αποκωδικοποίηση απευθείας σε μικρότερη κλίμακα όταν η εικόνα είναι πολύ μεγάλη
+        source.draft('RGB', (max_dimension, max_dimension))
+        img = ImageOps.exif_transpose(source)
+        if img.mode not in ('RGB', 'RGBA', 'L'):
+            img = img.convert('RGBA' if img.has_transparency_data else 'RGB')
+        
+        img.thumbnail((max_dimension, max_dimension), Image.LANCZOS)
+        blob_store.write_derived(photo_variant_key(key, 'display'), _encode_webp(img, webp_quality))
+        img.thumbnail((thumbnail_size, thumbnail_size), Image.LANCZOS)
+        blob_store.write_derived(photo_variant_key(key, 'thumb'), _encode_webp(img, webp_quality))
+
+def _photo_processed(key):
+    return all(blob_store.exists(photo_variant_key(key, variant)) for variant in PHOTO_VARIANTS)
+
+def schedule_photo_processing(key):
+    """Job επεξεργασίας στο τρέχον transaction (χωρίς commit) - το request δεν περιμένει"""
+    if not _photo_processed(key):  # Διπλότυπη φωτογραφία που έχει ήδη επεξεργαστεί
+        enqueue_job('process_photo', key=key)
+
+@job_task('process_photo')
+def process_photo_job(key):
+    if not _photo_processed(key):
+        process_violation_photo(
+            key, app.config['PHOTO_MAX_DIMENSION'], app.config['PHOTO_THUMBNAIL_SIZE'], app.config['PHOTO_WEBP_QUALITY']
+        )
+
+@app.template_global()
+def photo_variants(filename):
+    """URLs των διαθέσιμων εκδοχών μιας φωτογραφίας ('original', 'display', 'thumb')"""
+    if not filename:
+        return {}
+    if not blob_store.is_valid_key(filename):
+        # Παλιά φωτογραφία κάτω από static/uploads
+        return {'original': url_for('static', filename=f'uploads/{filename}')}
+    variants = {'original': url_for('serve_blob', key=filename)}
+    for variant in PHOTO_VARIANTS:
+        variant_key = photo_variant_key(filename, variant)
+        if blob_store.exists(variant_key):
+            variants[variant] = url_for('serve_blob', key=variant_key)
+    return variants
+
+# ======================== DRIVER SIGNATURES ========================
+
+def compact_signature_png(data_url):
+    """Base64 PNG από το canvas -> συμπιεσμένο PNG κλίμακας του γκρι με alpha"""
+    try:
+        raw = base64.b64decode(data_url.split(',', 1)[-1], validate=True)
+        with Image.open(io.BytesIO(raw)) as img:
+            if img.format != 'PNG':
+                raise ValueError(img.format)
+            signature = img.convert('LA')
+    except Exception:
+        raise PhotoError('Η υπογραφή δεν είναι έγκυρη.')
+    buffer = io.BytesIO()
+    signature.save(buffer, 'PNG', optimize=True)
+    return buffer.getvalue()
+
+def store_driver_signature(data_url):
+    """Αποθήκευση υπογραφής στο blob store. Επιστρέφει το κλειδί ή None αν δεν υπάρχει υπογραφή"""
+    if not data_url:
+        return None
+    return blob_store.put_bytes(compact_signature_png(data_url), '.png')
+
+@app.template_global()
+def signature_url(key):
+    return url_for('serve_blob', key=key) if key else None
+
+def migrate_signatures(batch_size=200):
+    """Μεταφορά των base64 υπογραφών της violation.driver_signature στο blob store σε batches
+    
+    Επιστρέφει το πλήθος των υπογραφών που μεταφέρθηκαν.
+    """
+    violation_table = Violation.__table__
+    update_stmt = violation_table.update()\
+        .where(violation_table.c.id == bindparam('_id'))\
+        .values(driver_signature_key=bindparam('_key'), driver_signature=None,
+                updated_at=violation_table.c.updated_at)
+    
+    last_id = 0
+    migrated = 0
+    while True:
+        rows = db.session.execute(
+            db.select(violation_table.c.id, violation_table.c.driver_signature)
+                .where(violation_table.c.id > last_id, violation_table.c.driver_signature != None)
+                .order_by(violation_table.c.id)
+                .limit(batch_size)
+        ).all()
+        if not rows:
+            break
+        
+        params = []
+        for row in rows:
+            try:
+                params.append({'_id': row.id, '_key': store_driver_signature(row.driver_signature)})
+            except PhotoError:
+                logger.warning(f"Μη έγκυρη υπογραφή στην παράβαση {row.id} - παραμένει ως έχει")
+        if params:
+            db.session.execute(update_stmt, params)
+        db.session.commit()
+        last_id = rows[-1].id
+        migrated += len(params)
+    
+    return migrated
+
+# ======================== REPORTS ========================
+
+app.config.setdefault('REPORT_EXPORT_BATCH_SIZE', 1000)   # Γραμμές ανά fetch του server-side cursor
+app.config.setdefault('REPORT_MAX_DAYS', 3 * 366)
+
+REPORT_EXPORT_HEADERS = [
+    'Α/Α', 'Ημερομηνία', 'Ώρα', 'Πινακίδα', 'Μάρκα', 'Χρώμα', 'Τύπος Οχήματος', 'Οδός', 'Αριθμός',
+    'Άρθρα', 'Πρόστιμο (€)', 'Αφαίρεση Πινακίδων', 'Αφαίρεση Άδειας Οδήγησης',
+    'Αφαίρεση Άδειας Κυκλοφορίας', 'Αστυνομικός',
+]
+
+class ReportError(ValueError):
+    """Μη έγκυρα φίλτρα αναφοράς"""
+
+def parse_report_filters(form):
+    """Φίλτρα αναφοράς από τη φόρμα: διάστημα ημερομηνιών, αστυνομικός, τύπος παράβασης"""
+    try:
+        start_date = datetime.strptime(form.get('start_date', ''), '%Y-%m-%d').date()
+        end_date = datetime.strptime(form.get('end_date', ''), '%Y-%m-%d').date()
+    except ValueError:
+        raise ReportError('Μη έγκυρο χρονικό διάστημα αναφοράς.')
+    if start_date > end_date:
+        raise ReportError('Η αρχική ημερομηνία είναι μετά την τελική.')
+    if (end_date - start_date).days > app.config['REPORT_MAX_DAYS']:
+        raise ReportError('Το χρονικό διάστημα της αναφοράς είναι υπερβολικά μεγάλο.')
+    
+    def optional_id(name):
+        value = form.get(name, 'all')
+        if value in ('', 'all'):
+            return None
+        try:
+            return int(value)
+        except ValueError:
+            raise ReportError('Μη έγκυρο φίλτρο αναφοράς.')
+    
+    return {
+        'start_date': start_date,
+        'end_date': end_date,
+        'officer_id': optional_id('officer_id'),
+        'violations_data_id': optional_id('violations_data_id'),
+    }
+
+def _report_conditions(filters):
+    """WHERE συνθήκες πάνω στα indexed πεδία (violation_date, officer_id, violation_item)"""
+    conditions = [Violation.violation_date >= filters['start_date'], Violation.violation_date <= filters['end_date']]
+    if filters['officer_id']:
+        conditions.append(Violation.officer_id == filters['officer_id'])
+    if filters['violations_data_id']:
+        conditions.append(db.exists().where(
+            ViolationItem.violation_id == Violation.id,
+            ViolationItem.violations_data_id == filters['violations_data_id']
+        ))
+    return conditions
+
+def report_summary(filters):
+    """Συγκεντρωτικά της αναφοράς - όλα υπολογίζονται στη βάση με GROUP BY"""
+    conditions = _report_conditions(filters)
+    removals = or_(Violation.plates_removed == True, Violation.license_removed == True,
+                   Violation.registration_removed == True)
+    totals = db.session.query(
+        func.count(Violation.id),
+        func.coalesce(func.sum(Violation.total_fine_amount), 0),
+        func.coalesce(func.sum(db.case((Violation.photo_filename != None, 1), else_=0)), 0),
+        func.coalesce(func.sum(db.case((removals, 1), else_=0)), 0),
+    ).filter(*conditions).one()
+    
+    by_officer = db.session.query(
+        User.rank, User.first_name, User.last_name, func.count(Violation.id),
+        func.coalesce(func.sum(Violation.total_fine_amount), 0)
+    ).join(User, User.id == Violation.officer_id)\
+        .filter(*conditions)\
+        .group_by(User.id, User.rank, User.first_name, User.last_name)\
+        .order_by(func.count(Violation.id).desc()).all()
+    
+    by_day = db.session.query(Violation.violation_date, func.count(Violation.id))\
+        .filter(*conditions)\
+        .group_by(Violation.violation_date)\
+        .order_by(Violation.violation_date).all()
+    
+    return {
+        'violations': int(totals[0]),
+        'total_fine': float(totals[1]),
+        'with_photos': int(totals[2]),
+        'with_removals': int(totals[3]),
+        'by_officer': [
+            {'name': f"{rank} {first_name} {last_name}", 'count': int(count), 'total_fine': float(total)}
+            for rank, first_name, last_name, count, total in by_officer
+        ],
+        'by_day': [{'date': day, 'count': int(count)} for day, count in by_day],
+        'by_article': violation_item_aggregates(
+            'article', start_date=filters['start_date'], end_date=filters['end_date'],
+            officer_id=filters['officer_id'], violations_data_id=filters['violations_data_id']
+        ),
+    }
+
+def report_rows(filters):
+    """Οι παραβάσεις της αναφοράς ως ροή γραμμών (server-side cursor μέσω yield_per)"""
+    stmt = db.select(
+        Violation.id, Violation.violation_date, Violation.violation_time, Violation.license_plate,
+        Violation.vehicle_brand, Violation.vehicle_color, Violation.vehicle_type, Violation.street,
+        Violation.street_number, Violation.violation_articles, Violation.total_fine_amount,
+        Violation.plates_removed, Violation.license_removed, Violation.registration_removed,
+        User.rank, User.first_name, User.last_name,
+    ).outerjoin(User, User.id == Violation.officer_id)\
+        .where(*_report_conditions(filters))\
+        .order_by(Violation.violation_date, Violation.violation_time, Violation.id)\
+        .execution_options(yield_per=app.config['REPORT_EXPORT_BATCH_SIZE'])
+    
+    for row in db.session.execute(stmt):
+        try:
+            articles = ', '.join(json.loads(row.violation_articles)) if row.violation_articles else ''
+        except (TypeError, ValueError):
+            articles = ''
+        yield [
+            row.id,
+            row.violation_date.strftime('%d/%m/%Y') if row.violation_date else '',
+            row.violation_time.strftime('%H:%M') if row.violation_time else '',
+            row.license_plate, row.vehicle_brand, row.vehicle_color, row.vehicle_type,
+            row.street, row.street_number, articles,
+            float(row.total_fine_amount) if row.total_fine_amount is not None else 0.0,
+            'Ναι' if row.plates_removed else 'Όχι',
+            'Ναι' if row.license_removed else 'Όχι',
+            'Ναι' if row.registration_removed else 'Όχι',
+            f"{row.rank} {row.first_name} {row.last_name}" if row.first_name is not None else '',
+        ]
+
+def report_csv_chunks(filters, flush_every=500):
+    """CSV σε κομμάτια - στη μνήμη υπάρχουν το πολύ flush_every γραμμές"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    buffer.write('\ufeff')  # BOM ώστε το Excel να αναγνωρίζει UTF-8 (ελληνικά)
+    writer.writerow(REPORT_EXPORT_HEADERS)
+    for count, values in enumerate(report_rows(filters), 1):
+        writer.writerow(values)
+        if count % flush_every == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+def report_xlsx_chunks(filters):
+    """XLSX μέσω write-only workbook (οι γραμμές γράφονται σε προσωρινό αρχείο, όχι στη μνήμη)"""
+    from openpyxl import Workbook
+    
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet('Παραβάσεις')
+    sheet.append(REPORT_EXPORT_HEADERS)
+    for values in report_rows(filters):
+        sheet.append(values)
+    
+    with tempfile.TemporaryFile() as f:
+        workbook.save(f)
+        f.seek(0)
+        yield from iter(lambda: f.read(BLOB_CHUNK_SIZE), b'')
+
+# ======================== HOTSPOT ANALYTICS ========================
+
+app.config.setdefault('HOTSPOT_CACHE_TTL', 300)
+app.config.setdefault('HOTSPOT_DEFAULT_DAYS', 90)
+app.config.setdefault('HOTSPOT_MAX_DAYS', 366)
+app.config.setdefault('HOTSPOT_TOP_STREETS', 15)
+hotspot_cache = LRUTTLCache(maxsize=32, ttl=app.config['HOTSPOT_CACHE_TTL'], name='hotspots')
+
+WEEKDAY_LABELS = ['Δευ', 'Τρι', 'Τετ', 'Πεμ', 'Παρ', 'Σαβ', 'Κυρ']
+
+def hotspot_columns(start_date, end_date, officer_id=None):
+    """Οι στήλες της ανάλυσης ως NumPy arrays από ένα query (ώρα/ημερομηνία ως κείμενο για vectorized parsing)"""
+    query = db.session.query(
+        Violation.street,
+        db.cast(Violation.violation_date, db.String),
+        db.cast(Violation.violation_time, db.String),
+        Violation.total_fine_amount,
+        Violation.officer_id,
+    ).filter(Violation.violation_date >= start_date, Violation.violation_date <= end_date)
+    if officer_id:
+        query = query.filter(Violation.officer_id == officer_id)
+    
+    rows = query.all()
+    if not rows:
+        return None
+    streets, dates, times, fines, officers = zip(*rows)
+    return {
+        'street': np.char.upper(np.char.strip(np.array(streets, dtype=str))),
+        'date': np.array(dates, dtype='U10').astype('datetime64[D]'),
+        'hour': np.array(times, dtype='U2').astype(np.int64),   # 'HH:MM:SS' -> HH
+        'fine': np.nan_to_num(np.array(fines, dtype=float)),    # None -> NaN -> 0
+        'officer': np.array(officers, dtype=np.int64),
+    }
+
+def compute_hotspots(columns, top_streets):
+    """Ιστογράμματα οδός × ημέρα εβδομάδας × ώρα και κάλυψη ανά αστυνομικό με bincount (χωρίς βρόχους ανά γραμμή)"""
+    street_names, street_idx = np.unique(columns['street'], return_inverse=True)
+    # 1970-01-01 ήταν Πέμπτη: +3 ώστε Δευτέρα = 0
+    weekday = (columns['date'].astype(np.int64) + 3) % 7
+    hour = np.clip(columns['hour'], 0, 23)
+    n_streets = len(street_names)
+    
+    cell = (street_idx * 7 + weekday) * 24 + hour
+    counts = np.bincount(cell, minlength=n_streets * 168).reshape(n_streets, 7, 24)
+    fines = np.bincount(cell, weights=columns['fine'], minlength=n_streets * 168).reshape(n_streets, 7, 24)
+    
+    street_counts = counts.sum(axis=(1, 2))
+    street_fines = fines.sum(axis=(1, 2))
+    top = np.argsort(-street_counts, kind='stable')[:top_streets]
+    
+    streets = []
+    for index in top:
+        grid = counts[index]
+        peak_weekday, peak_hour = np.unravel_index(np.argmax(grid), grid.shape)
+        streets.append({
+            'street': str(street_names[index]),
+            'count': int(street_counts[index]),
+            'total_fine': round(float(street_fines[index]), 2),
+            'peak_weekday': WEEKDAY_LABELS[int(peak_weekday)],
+            'peak_hour': int(peak_hour),
+            'by_hour': grid.sum(axis=0).tolist(),
+        })
+    
+    # Κάλυψη ανά αστυνομικό: παραβάσεις, διακριτές οδοί και ώρες δραστηριότητας
+    officer_ids, officer_idx = np.unique(columns['officer'], return_inverse=True)
+    n_officers = len(officer_ids)
+    officer_counts = np.bincount(officer_idx, minlength=n_officers)
+    distinct_pairs = np.unique(officer_idx * n_streets + street_idx)
+    officer_streets = np.bincount(distinct_pairs // n_streets, minlength=n_officers)
+    officer_hours = np.bincount(officer_idx * 24 + hour, minlength=n_officers * 24).reshape(n_officers, 24)
+    
+    names = {
+        user.id: user.full_name
+        for user in User.query.options(db.load_only(User.id, User.rank, User.first_name, User.last_name))
+            .filter(User.id.in_(officer_ids.tolist()))
+    }
+    officers = [
+        {
+            'officer_id': int(officer_id),
+            'name': names.get(int(officer_id), f'#{officer_id}'),
+            'count': int(officer_counts[i]),
+            'streets': int(officer_streets[i]),
+            'hours_covered': int(np.count_nonzero(officer_hours[i])),
+        }
+        for i, officer_id in enumerate(officer_ids)
+    ]
+    officers.sort(key=lambda officer: officer['count'], reverse=True)
+    
+    return {
+        'total': int(street_counts.sum()),
+        'total_fine': round(float(street_fines.sum()), 2),
+        'weekday_hour': counts.sum(axis=0).tolist(),
+        'weekday_labels': WEEKDAY_LABELS,
+        'streets': streets,
+        'officers': officers,
+    }
+
+def hotspot_analytics(start_date, end_date, officer_id=None):
+    """Αποτέλεσμα της ανάλυσης hotspots, cached για HOTSPOT_CACHE_TTL δευτερόλεπτα"""
+    cache_key = (start_date, end_date, officer_id)
+    result = hotspot_cache.get(cache_key)
+    if result is None:
+        columns = hotspot_columns(start_date, end_date, officer_id)
+        result = compute_hotspots(columns, app.config['HOTSPOT_TOP_STREETS']) if columns else {
+            'total': 0, 'total_fine': 0.0, 'weekday_hour': [[0] * 24 for _ in range(7)],
+            'weekday_labels': WEEKDAY_LABELS, 'streets': [], 'officers': [],
+        }
+        result = dict(result, start_date=start_date.isoformat(), end_date=end_date.isoformat())
+        hotspot_cache.set(cache_key, result)
+    return result
+
+# ======================== KEYSET PAGINATION ========================
+
+class KeysetPage:
+    """Σελίδα αποτελεσμάτων με cursor (keyset) pagination σε φθίνουσα σειρά μοναδικού κλειδιού"""
+    
+    def __init__(self, items, per_page, has_next, has_prev, next_cursor, prev_cursor, total=None):
+        self.items = items
+        self.per_page = per_page
+        self.has_next = has_next
+        self.has_prev = has_prev
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+        self.total = total  # None όταν δεν υπολογίζεται (π.χ. φιλτραρισμένες αναζητήσεις)
+
+def encode_cursor(direction, key):
+    """Opaque token: 'n' = επόμενη (παλαιότερα), 'p' = προηγούμενη (νεότερα)"""
+    return base64.urlsafe_b64encode(f'{direction}:{key}'.encode()).decode().rstrip('=')
+
+def decode_cursor(token):
+    """Επιστρέφει (direction, key) ή (None, None) για κενό/άκυρο token"""
+    if not token:
+        return None, None
+    try:
+        direction, key = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)).decode().split(':', 1)
+        if direction not in ('n', 'p'):
+            return None, None
+        return direction, int(key)
+    except (ValueError, UnicodeDecodeError):
+        return None, None
+
+def keyset_paginate(query, key_column, cursor=None, per_page=50, key=lambda item: item.id, total=None):
+    """Keyset pagination σε (key_column DESC) χωρίς OFFSET και χωρίς COUNT(*)"""
+    direction, cursor_key = decode_cursor(cursor)
+    
+    if direction == 'p':
+        rows = query.filter(key_column > cursor_key).order_by(key_column.asc()).limit(per_page + 1).all()
+        has_prev = len(rows) > per_page
+        items = list(reversed(rows[:per_page]))
+        has_next = True
+    else:
+        if direction == 'n':
+            query = query.filter(key_column < cursor_key)
+        rows = query.order_by(key_column.desc()).limit(per_page + 1).all()
+        has_next = len(rows) > per_page
+        items = rows[:per_page]
+        has_prev = direction == 'n'
+    
+    if not items:
+        has_next = has_prev = False
+    
+    return KeysetPage(
+        items=items,
+        per_page=per_page,
+        has_next=has_next,
+        has_prev=has_prev,
+        next_cursor=encode_cursor('n', key(items[-1])) if has_next else None,
+        prev_cursor=encode_cursor('p', key(items[0])) if has_prev else None,
+        total=total
+    )
+
+# ======================== SQL INSTRUMENTATION ========================
+
+app.config.setdefault('SQL_INSTRUMENTATION', os.environ.get('SQL_INSTRUMENTATION', '1') == '1')
+app.config.setdefault('SQL_SLOW_QUERY_MS', float(os.environ.get('SQL_SLOW_QUERY_MS', 200)))
+# N+1: το ίδιο statement με τόσες (ή περισσότερες) διαφορετικές παραμέτρους μέσα σε ένα request
+app.config.setdefault('SQL_N_PLUS_ONE_THRESHOLD', 5)
+app.config.setdefault('SQL_LOG_QUERY_COUNT', 20)  # Requests με τόσα queries καταγράφονται σε INFO, τα υπόλοιπα σε DEBUG
+app.config.setdefault('SQL_SLOWEST_KEPT', 3)
+
+sql_logger = logging.getLogger(f'{__name__}.sql')
+
+class RequestSQLStats:
+    """Queries ενός request: πλήθος, συνολικός χρόνος, τα πιο αργά και επαναλήψεις ανά statement"""
+    
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.slow = 0
+        self.slowest = []
+        self.statements = {}
+    
+    def record(self, statement, parameters, duration):
+        self.count += 1
+        self.duration += duration
+        executions = self.statements.setdefault(statement, [0, set()])
+        executions[0] += 1
+        executions[1].add(hash(repr(parameters)))
+        if not self.slowest or duration > self.slowest[-1][0] or len(self.slowest) < app.config['SQL_SLOWEST_KEPT']:
+            self.slowest.append((duration, statement))
+            self.slowest.sort(key=lambda item: item[0], reverse=True)
+            del self.slowest[app.config['SQL_SLOWEST_KEPT']:]
+    
+    def n_plus_one(self, threshold):
+        """Statements που εκτελέστηκαν με >= threshold διαφορετικές παραμέτρους (υπογραφή N+1)"""
+        return [
+            (statement, count, len(parameters))
+            for statement, (count, parameters) in self.statements.items()
+            if len(parameters) >= threshold
+        ]
+
+def _sql_summary(statement, limit=200):
+    return ' '.join(statement.split())[:limit]
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _sql_timer_start(conn, cursor, statement, parameters, context, executemany):
+    if app.config['SQL_INSTRUMENTATION']:
+        conn.info.setdefault('_query_started', []).append(time.perf_counter())
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _sql_timer_stop(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.get('_query_started')
+    if not started:
+        return
+    duration = time.perf_counter() - started.pop()
+    in_request = has_request_context()
+    stats = g.get('_sql_stats') if in_request else None
+    if stats is not None:
+        stats.record(statement, parameters, duration)
+    
+    if duration * 1000 >= app.config['SQL_SLOW_QUERY_MS']:
+        if stats is not None:
+            stats.slow += 1
+        where = request.endpoint if in_request else threading.current_thread().name
+        sql_logger.warning(f"Αργό query ({duration * 1000:.0f}ms, {where}): {_sql_summary(statement, 500)}")
+
+@event.listens_for(Engine, 'handle_error')
+def _sql_timer_discard(exception_context):
+    connection = exception_context.connection
+    if connection is not None and connection.info.get('_query_started'):
+        connection.info['_query_started'].pop()
+
+@app.before_request
+def _start_request_sql_stats():
+    if app.config['SQL_INSTRUMENTATION']:
+        g._sql_stats = RequestSQLStats()
+
+@app.after_request
+def _report_request_sql_stats(response):
+    """Server-Timing headers και μία γραμμή log (JSON) με τα queries του request"""
+    stats = g.pop('_sql_stats', None)
+    if stats is None:
+        return response
+    total_ms = (time.perf_counter() - g._request_started) * 1000
+    db_ms = stats.duration * 1000
+    response.headers.add('Server-Timing', f'db;desc="{stats.count} queries";dur={db_ms:.1f}')
+    response.headers.add('Server-Timing', f'app;dur={total_ms:.1f}')
+    
+    n_plus_one = stats.n_plus_one(app.config['SQL_N_PLUS_ONE_THRESHOLD'])
+    if n_plus_one:
+        level = logging.WARNING
+    elif stats.slow or stats.count >= app.config['SQL_LOG_QUERY_COUNT']:
+        level = logging.INFO
+    else:
+        level = logging.DEBUG
+    if sql_logger.isEnabledFor(level):
+        sql_logger.log(level, 'sql_stats ' + json.dumps({
+            'method': request.method,
+            'path': request.path,
+            'endpoint': request.endpoint,
+            'status': response.status_code,
+            'queries': stats.count,
+            'db_ms': round(db_ms, 1),
+            'total_ms': round(total_ms, 1),
+            'slow_queries': stats.slow,
+            'slowest': [{'ms': round(duration * 1000, 1), 'sql': _sql_summary(statement)}
+                        for duration, statement in stats.slowest],
+            'n_plus_one': [{'sql': _sql_summary(statement), 'executions': count, 'distinct_params': distinct}
+                           for statement, count, distinct in n_plus_one],
+        }, ensure_ascii=False))
+    return response
+
+# ======================== TEMPLATE LAZY-LOAD CHECK ========================
+
+# None: ενεργό μόνο σε debug mode. Αποτυγχάνει αν ένα template προκαλέσει lazy load (N+1)
+app.config.setdefault('TEMPLATE_LAZY_LOAD_CHECK', None)
+
+class TemplateLazyLoadError(AssertionError):
+    """Lazy load σχέσης/στήλης κατά το rendering template - χρειάζεται eager loading στο route"""
+
+def _template_lazy_load_check_enabled():
+    flag = app.config['TEMPLATE_LAZY_LOAD_CHECK']
+    return app.debug if flag is None else flag
+
+@before_render_template.connect_via(app)
+def _mark_template_rendering(sender, template, context, **extra):
+    g._rendering_template = template.name
+
+@template_rendered.connect_via(app)
+def _unmark_template_rendering(sender, template, context, **extra):
+    g.pop('_rendering_template', None)
+
+@event.listens_for(OrmSession, 'do_orm_execute')
+def _check_template_lazy_load(orm_execute_state):
+    if not (orm_execute_state.is_relationship_load or orm_execute_state.is_column_load):
+        return
+    if not has_request_context() or not _template_lazy_load_check_enabled():
+        return
+    template_name = g.get('_rendering_template')
+    if template_name:
+        raise TemplateLazyLoadError(
+            f"Lazy load κατά το rendering του '{template_name}' ({request.endpoint}): "
+            f"{orm_execute_state.statement}"
+        )
 
 # ======================== MAIN ROUTES ========================
 
@@ -406,8 +2172,7 @@ def login():
         if user and user.check_password(password) and user.is_active:
             session['user_id'] = user.id
             session['username'] = user.username
-            session['user_role'] = user.role
-            session['full_name'] = user.full_name
+            store_identity_snapshot(user)
             session.permanent = True
             
             flash(f'Καλώς ήρθατε, {user.full_name}!', 'success')
@@ -424,6 +2189,306 @@ def logout():
     flash('Αποσυνδεθήκατε επιτυχώς.', 'info')
     return redirect(url_for('login'))
 
+# ======================== EVENT STREAM (SSE) ========================
+
+# 'spool': κοινό append-only αρχείο στο instance/ ώστε τα events να φτάνουν σε όλους τους gunicorn workers
+# 'local': μόνο in-process (ένας worker / development)
+app.config.setdefault('EVENT_BROKER', os.environ.get('EVENT_BROKER', 'spool'))
+app.config.setdefault('SSE_HEARTBEAT_SECONDS', 15)
+app.config.setdefault('SSE_MAX_STREAM_SECONDS', 300)  # Μετά ο browser επανασυνδέεται αυτόματα
+# Κάθε stream δεσμεύει ένα gthread thread: πάνω από το όριο ανά worker απαντάμε 204 και ο browser κάνει polling
+# στο /api/badges, ώστε να μένουν threads για τα κανονικά requests (βλ. threads στο gunicorn.conf.py)
+app.config.setdefault('SSE_MAX_STREAMS', int(os.environ.get('SSE_MAX_STREAMS', 8)))
+
+_sse_slots = threading.BoundedSemaphore(app.config['SSE_MAX_STREAMS'])
+
+class EventBroker:
+    """In-process pub/sub: κάθε ανοιχτό SSE stream έχει τη δική του ουρά ανά χρήστη"""
+    
+    def __init__(self):
+        self._subscribers = {}
+        self._versions = {}
+        self._lock = threading.Lock()
+        self.boot_token = os.urandom(4).hex()  # Τα versions δεν επιβιώνουν restart - αλλάζει και το ETag
+    
+    def version(self, user_id):
+        """Μετρητής αλλαγών (ειδοποιήσεις/μηνύματα) του χρήστη σε αυτόν τον worker"""
+        with self._lock:
+            return self._versions.setdefault(user_id, 0)
+    
+    def _bump(self, user_id):
+        with self._lock:
+            if user_id in self._versions:
+                self._versions[user_id] += 1
+    
+    def subscribe(self, user_id):
+        subscriber = queue.Queue(maxsize=100)
+        with self._lock:
+            self._subscribers.setdefault(user_id, set()).add(subscriber)
+        return subscriber
+    
+    def unsubscribe(self, user_id, subscriber):
+        with self._lock:
+            subscribers = self._subscribers.get(user_id)
+            if subscribers:
+                subscribers.discard(subscriber)
+                if not subscribers:
+                    del self._subscribers[user_id]
+    
+    def publish(self, user_id, event, data=None):
+        self._deliver(user_id, event, data or {})
+    
+    def publish_many(self, events):
+        """Πολλά events (user_id, event, data) μαζί - π.χ. fan-out ενός μαζικού μηνύματος"""
+        for user_id, event, data in events:
+            self._deliver(user_id, event, data or {})
+    
+    def _deliver(self, user_id, event, data):
+        self._bump(user_id)
+        with self._lock:
+            subscribers = list(self._subscribers.get(user_id, ()))
+        for subscriber in subscribers:
+            try:
+                subscriber.put_nowait((event, data))
+            except queue.Full:
+                pass  # Αργός client - θα ξαναφορτώσει τα badges στην επανασύνδεση
+
+class SpoolEventBroker(EventBroker):
+    """Τοπικός broker stand-in: τα events γράφονται σε κοινό αρχείο και κάθε worker το διαβάζει (tail)
+    
+    Όταν το αρχείο ξεπεράσει το MAX_SPOOL_BYTES μετονομάζεται (rotate) και οι readers, που κρατούν ανοιχτό
+    το παλιό inode, το διαβάζουν μέχρι το τέλος πριν περάσουν στο νέο. Νέο rotate γίνεται μόνο αφού περάσει
+    το ROTATE_GRACE_SECONDS, ώστε να έχουν περάσει όλοι οι readers στο τρέχον αρχείο.
+    """
+    
+    POLL_INTERVAL = 0.5
+    MAX_SPOOL_BYTES = 1024 * 1024
+    ROTATE_GRACE_SECONDS = 10
+    
+    def __init__(self, path):
+        super().__init__()
+        self.path = path
+        root, ext = os.path.splitext(path)
+        self.rotated_path = f'{root}-1{ext}'
+        self._reader = None
+        self._write_lock = (None, None)  # (pid, αρχείο) - το flock δεν αποκλείει processes που το μοιράζονται μετά από fork
+    
+    def subscribe(self, user_id):
+        self._ensure_reader()
+        return super().subscribe(user_id)
+    
+    def version(self, user_id):
+        # Ο reader πρέπει να τρέχει πριν εκδοθεί version, αλλιώς θα χάναμε αλλαγές άλλων workers
+        self._ensure_reader()
+        return super().version(user_id)
+    
+    def _bump_all(self):
+        with self._lock:
+            for user_id in self._versions:
+                self._versions[user_id] += 1
+    
+    def publish(self, user_id, event, data=None):
+        self.publish_many([(user_id, event, data)])
+    
+    def publish_many(self, events):
+        """Όλα τα events με ένα άνοιγμα/μία εγγραφή στο spool"""
+        events = [(user_id, event, data or {}) for user_id, event, data in events]
+        if not events:
+            return
+        for user_id, _, _ in events:
+            self._bump(user_id)  # Άμεσα για τον ίδιο worker, χωρίς να περιμένουμε το επόμενο πέρασμα του reader
+        lines = ''.join(
+            json.dumps({'user_id': user_id, 'event': event, 'data': data}) + '\n' for user_id, event, data in events
+        )
+        try:
+            self._append(lines)
+        except OSError as e:
+            logger.warning(f"Αδυναμία εγγραφής events στο spool: {str(e)}")
+            for user_id, event, data in events:
+                self._deliver(user_id, event, data)
+    
+    def _append(self, text):
+        """Εγγραφή (και rotate αν χρειάζεται) υπό αποκλειστικό lock ώστε να μη χάνονται γραμμές άλλων workers"""
+        import fcntl
+        pid, lock_file = self._write_lock
+        if pid != os.getpid():
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            lock_file = open(self.path + '.lock', 'w')
+            self._write_lock = (os.getpid(), lock_file)
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            try:
+                oversized = os.stat(self.path).st_size > self.MAX_SPOOL_BYTES
+            except FileNotFoundError:
+                oversized = False
+            if oversized and (
+                not os.path.exists(self.rotated_path)
+                or os.path.getmtime(self.rotated_path) < time.time() - self.ROTATE_GRACE_SECONDS
+            ):
+                os.replace(self.path, self.rotated_path)
+            with open(self.path, 'a', encoding='utf-8') as spool:
+                spool.write(text)
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+    
+    def _open_spool(self, at_end):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        spool = open(self.path, 'a+b')
+        spool.seek(0, os.SEEK_END if at_end else os.SEEK_SET)
+        return spool
+    
+    def _ensure_reader(self):
+        with self._lock:
+            if self._reader is None or not self._reader.is_alive():
+                # Η θέση εκκίνησης δεσμεύεται εδώ, πριν επιστρέψει το version(), όχι όταν ξεκινήσει το thread
+                try:
+                    spool = self._open_spool(at_end=True)
+                except OSError as e:
+                    logger.warning(f"Σφάλμα ανοίγματος event spool: {str(e)}")
+                    spool = None
+                self._reader = threading.Thread(target=self._tail, args=(spool,), name='event-spool-reader', daemon=True)
+                self._reader.start()
+    
+    def _dispatch(self, buffer):
+        """Παράδοση των πλήρων γραμμών. Επιστρέφει τυχόν μισογραμμένη τελευταία γραμμή για το επόμενο πέρασμα"""
+        complete, _, pending = buffer.rpartition(b'\n')
+        for line in complete.splitlines():
+            try:
+                item = json.loads(line)
+            except ValueError:
+                continue
+            self._deliver(item['user_id'], item['event'], item['data'])
+        return pending
+    
+    def _tail(self, spool):
+        pending = b''
+        while True:
+            try:
+                if spool is None:
+                    spool = self._open_spool(at_end=False)
+                    self._bump_all()  # Άγνωστο τι χάθηκε όσο δεν υπήρχε reader
+                chunk = spool.read()
+                if chunk:
+                    pending = self._dispatch(pending + chunk)
+                    continue
+                try:
+                    rotated = not os.path.samestat(os.stat(self.path), os.fstat(spool.fileno()))
+                except FileNotFoundError:
+                    rotated = True
+                if rotated:
+                    # Οι γραμμές που γράφτηκαν πριν από το rename βρίσκονται ακόμη στο ανοιχτό inode
+                    self._dispatch(pending + spool.read())
+                    spool.close()
+                    spool, pending = None, b''
+                    continue
+            except OSError as e:
+                logger.warning(f"Σφάλμα ανάγνωσης event spool: {str(e)}")
+                if spool is not None:
+                    spool.close()
+                spool, pending = None, b''
+            time.sleep(self.POLL_INTERVAL)
+
+if app.config['EVENT_BROKER'] == 'spool':
+    event_broker = SpoolEventBroker(os.path.join(app.instance_path, 'events.spool'))
+else:
+    event_broker = EventBroker()
+
+@app.route('/api/stream')
+@login_required
+def event_stream():
+    """Server-Sent Events: ειδοποιήσεις και αλλαγές μηνυμάτων μόνο όταν συμβαίνουν"""
+    if not _sse_slots.acquire(blocking=False):
+        return Response(status=204)  # Το EventSource δεν επανασυνδέεται - ο client περνά σε polling
+    
+    user_id = session['user_id']
+    subscriber = event_broker.subscribe(user_id)
+    heartbeat = app.config['SSE_HEARTBEAT_SECONDS']
+    max_seconds = app.config['SSE_MAX_STREAM_SECONDS']
+    
+    def generate():
+        yield 'retry: 5000\n\n'
+        deadline = time.monotonic() + max_seconds
+        while time.monotonic() < deadline:
+            try:
+                event, data = subscriber.get(timeout=heartbeat)
+            except queue.Empty:
+                yield ': keep-alive\n\n'
+                continue
+            yield f'event: {event}\ndata: {json.dumps(data)}\n\n'
+    
+    def close():
+        event_broker.unsubscribe(user_id, subscriber)
+        _sse_slots.release()
+    
+    response = Response(generate(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+    # Καλείται από τον WSGI server και όταν ο client κλείσει πριν ξεκινήσει ο generator
+    response.call_on_close(close)
+    return response
+
+# ======================== BADGES ========================
+
+def notification_payload(notification):
+    return {
+        'id': notification.id,
+        'title': notification.title,
+        'message': notification.message,
+        'type': notification.type,
+        'is_read': notification.is_read,
+        'created_at': notification.created_at.isoformat(),
+        'icon': notification.icon,
+        'related_message_id': notification.related_message_id
+    }
+
+@app.route('/api/badges')
+@login_required
+def get_badges():
+    """Μετρητές ειδοποιήσεων/μηνυμάτων και τελευταίες ειδοποιήσεις με ETag - 304 χωρίς πρόσβαση στη βάση"""
+    user_id = session['user_id']
+    # Το version διαβάζεται πριν από τα queries: μια αλλαγή στο μεταξύ απλώς ακυρώνει το ETag στο επόμενο poll
+    etag = f'{event_broker.boot_token}-{user_id}-{event_broker.version(user_id)}'
+    
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        unread_messages, unread_notifications = unread_counts(user_id)
+        notifications = Notification.query.filter_by(user_id=user_id)\
+            .order_by(Notification.created_at.desc())\
+            .limit(10).all()
+        response = jsonify({
+            'unread_notifications': unread_notifications,
+            'unread_messages': unread_messages,
+            'notifications': [notification_payload(notification) for notification in notifications]
+        })
+    
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+# ======================== MEDIA ========================
+
+@app.route('/media/<key>')
+@login_required
+def serve_blob(key):
+    """Αρχεία του blob store με strong ETag, Range και immutable caching (το κλειδί είναι το hash)"""
+    if not blob_store.is_valid_key(key) or not blob_store.exists(key):
+        abort(404)
+    
+    response = send_file(
+        blob_store.path(key),
+        mimetype=mimetypes.guess_type(key)[0] or 'application/octet-stream',
+        conditional=True,
+        etag=key,
+        max_age=app.config['BLOB_MAX_AGE'],
+    )
+    # Προσωπικά δεδομένα: μόνο ο browser του χρήστη κρατά αντίγραφο, όχι ενδιάμεσοι proxies
+    response.cache_control.public = False
+    response.cache_control.private = True
+    response.cache_control.immutable = True
+    return response
+
 # ======================== NOTIFICATION ROUTES ========================
 
 @app.route('/api/notifications')
@@ -437,23 +2502,10 @@ def get_notifications():
         .order_by(Notification.created_at.desc())\
         .limit(10).all()
     
-    unread_count = Notification.query.filter_by(user_id=user_id, is_read=False).count()
-    
-    notifications_data = []
-    for notification in notifications:
-        notifications_data.append({
-            'id': notification.id,
-            'title': notification.title,
-            'message': notification.message,
-            'type': notification.type,
-            'is_read': notification.is_read,
-            'created_at': notification.created_at.isoformat(),
-            'icon': notification.icon,
-            'related_message_id': notification.related_message_id
-        })
+    unread_count = unread_counts(user_id)[1]
     
     return jsonify({
-        'notifications': notifications_data,
+        'notifications': [notification_payload(notification) for notification in notifications],
         'unread_count': unread_count
     })
 
@@ -465,8 +2517,15 @@ def mark_notification_read(notification_id):
     
     notification = Notification.query.filter_by(id=notification_id, user_id=user_id).first()
     if notification:
-        notification.is_read = True
+        # Conditional UPDATE ώστε δύο ταυτόχρονα requests να μη μειώσουν δύο φορές τον μετρητή
+        marked = db.session.execute(
+            db.update(Notification)
+                .where(Notification.id == notification.id, Notification.is_read == False)
+                .values(is_read=True)
+        ).rowcount
+        adjust_unread_counters([user_id], notifications=-marked)
         db.session.commit()
+        event_broker.publish(user_id, 'notification', {'id': notification.id, 'read': True})
         return jsonify({'success': True})
     
     return jsonify({'success': False, 'error': 'Η ειδοποίηση δεν βρέθηκε'})
@@ -477,11 +2536,14 @@ def mark_all_notifications_read():
     """Σήμανση όλων των ειδοποιήσεων ως αναγνωσμένες"""
     user_id = session['user_id']
     
-    notifications = Notification.query.filter_by(user_id=user_id, is_read=False).all()
-    for notification in notifications:
-        notification.is_read = True
-    
+    marked = db.session.execute(
+        db.update(Notification)
+            .where(Notification.user_id == user_id, Notification.is_read == False)
+            .values(is_read=True)
+    ).rowcount
+    adjust_unread_counters([user_id], notifications=-marked)
     db.session.commit()
+    event_broker.publish(user_id, 'notification', {'read': True})
     return jsonify({'success': True})
 
 @app.route('/api/unread-messages')
@@ -490,8 +2552,8 @@ def get_unread_messages():
     """API endpoint για λήψη αριθμού μη αναγνωσμένων μηνυμάτων"""
     user_id = session['user_id']
     
-    # Υπολογισμός μη αναγνωσμένων μηνυμάτων
-    unread_count = MessageRecipient.query.filter_by(recipient_id=user_id, is_read=False).count()
+    # Μη αναγνωσμένα μηνύματα από τον μετρητή του χρήστη
+    unread_count = unread_counts(user_id)[0]
     
     return jsonify({
         'unread_count': unread_count
@@ -502,40 +2564,77 @@ def get_unread_messages():
 def sync_message_notifications():
     """API endpoint για δημιουργία notifications για υπάρχοντα μη αναγνωσμένα μηνύματα"""
     user_id = session['user_id']
+    notifications_created = sync_message_notifications_for_user(user_id)
     
-    # Βρες όλα τα μη αναγνωσμένα μηνύματα που δεν έχουν notification
-    unread_messages = db.session.query(Message, MessageRecipient).join(
-        MessageRecipient, Message.id == MessageRecipient.message_id
-    ).filter(
-        MessageRecipient.recipient_id == user_id,
-        MessageRecipient.is_read == False
-    ).all()
-    
-    notifications_created = 0
-    
-    for message, recipient in unread_messages:
-        # Έλεγχος αν υπάρχει ήδη notification για αυτό το μήνυμα
-        existing_notification = Notification.query.filter_by(
-            user_id=user_id,
-            related_message_id=message.id
-        ).first()
-        
-        if not existing_notification:
-            # Δημιουργία notification
-            create_notification(
-                user_id=user_id,
-                title="Νέο Μήνυμα",
-                message=f"Έχετε λάβει νέο μήνυμα από {message.sender.full_name}: {message.subject}",
-                notification_type='message',
-                related_message_id=message.id
-            )
-            notifications_created += 1
+    if notifications_created:
+        event_broker.publish(user_id, 'notification', {'synced': notifications_created})
     
     return jsonify({
         'success': True,
         'notifications_created': notifications_created
     })
 
+def sync_message_notifications_for_user(user_id):
+    """Δημιουργία ειδοποιήσεων για μη αναγνωσμένα μηνύματα χωρίς ειδοποίηση, μετά το watermark του χρήστη
+    
+    Στη συνήθη περίπτωση (κανένα νέο μήνυμα) εκτελείται ένα μόνο SELECT. Διαφορετικά ένα
+    INSERT ... SELECT με anti-join στο notification και ενημέρωση του watermark.
+    Επιστρέφει το πλήθος των ειδοποιήσεων που δημιουργήθηκαν.
+    """
+    watermark = func.coalesce(
+        db.select(MessageSyncState.last_message_id)
+            .where(MessageSyncState.user_id == user_id)
+            .scalar_subquery(),
+        0
+    )
+    row = db.session.query(watermark, func.max(MessageRecipient.message_id))\
+        .filter(MessageRecipient.recipient_id == user_id, MessageRecipient.message_id > watermark)\
+        .one()
+    last_synced_id, newest_id = row
+    if newest_id is None:
+        return 0
+    
+    sender = db.aliased(User)
+    has_notification = db.select(Notification.id).where(
+        Notification.user_id == user_id,
+        Notification.related_message_id == Message.id
+    ).exists()
+    missing = db.select(
+        db.literal(user_id),
+        db.literal("Νέο Μήνυμα"),
+        db.literal("Έχετε λάβει νέο μήνυμα από ") + sender.rank + " " + sender.first_name + " "
+            + sender.last_name + ": " + Message.subject,
+        db.literal('message'),
+        db.literal(False),
+        Message.id,
+        db.literal(datetime.utcnow()),
+    ).select_from(MessageRecipient)\
+        .join(Message, Message.id == MessageRecipient.message_id)\
+        .join(sender, sender.id == Message.sender_id)\
+        .where(
+            MessageRecipient.recipient_id == user_id,
+            MessageRecipient.is_read == False,
+            MessageRecipient.message_id > last_synced_id,
+            MessageRecipient.message_id <= newest_id,
+            ~has_notification
+        )
+    
+    result = db.session.execute(Notification.__table__.insert().from_select(
+        ['user_id', 'title', 'message', 'type', 'is_read', 'related_message_id', 'created_at'], missing
+    ))
+    adjust_unread_counters([user_id], notifications=result.rowcount)
+    
+    state_table = MessageSyncState.__table__
+    upsert = dialect_insert(state_table).values(
+        user_id=user_id, last_message_id=newest_id, updated_at=datetime.utcnow()
+    )
+    db.session.execute(upsert.on_conflict_do_update(
+        index_elements=[state_table.c.user_id],
+        set_={'last_message_id': upsert.excluded.last_message_id, 'updated_at': upsert.excluded.updated_at}
+    ))
+    db.session.commit()
+    return result.rowcount
+
 def create_notification(user_id, title, message, notification_type='info', related_message_id=None):
     """Helper function για δημιουργία ειδοποίησης"""
     notification = Notification(
@@ -546,30 +2645,85 @@ def create_notification(user_id, title, message, notification_type='info', relat
         related_message_id=related_message_id
     )
     db.session.add(notification)
+    adjust_unread_counters([user_id], notifications=1)
     db.session.commit()
+    event_broker.publish(user_id, 'notification', {
+        'id': notification.id,
+        'title': notification.title,
+        'type': notification.type
+    })
     return notification
 
+def create_notifications_bulk(user_ids, title, message, notification_type='info', related_message_id=None):
+    """Δημιουργία της ίδιας ειδοποίησης για πολλούς χρήστες με ένα bulk insert (χωρίς commit)
+    
+    Ο caller κάνει commit και δημοσιεύει τα events μετά το commit.
+    """
+    if not user_ids:
+        return
+    now = datetime.utcnow()
+    db.session.execute(db.insert(Notification), [
+        {
+            'user_id': user_id,
+            'title': title,
+            'message': message,
+            'type': notification_type,
+            'is_read': False,
+            'related_message_id': related_message_id,
+            'created_at': now
+        }
+        for user_id in user_ids
+    ])
+    adjust_unread_counters(user_ids, notifications=1)
+
+@job_task('violation_notifications')
+def violation_notifications_job(violation_id, actor_id, action):
+    """Ειδοποιήσεις καταχώρησης/ενημέρωσης παράβασης: ένα bulk insert, events μετά το commit του job"""
+    violation = db.session.get(Violation, violation_id)
+    actor = db.session.get(User, actor_id)
+    if violation is None or actor is None:
+        return
+    
+    if action == 'updated':
+        deliveries = [([actor.id], "Παράβαση Ενημερώθηκε",
+                       f"Η παράβαση #{violation.id} για το όχημα {violation.license_plate} ενημερώθηκε επιτυχώς.", 'info')]
+    else:
+        deliveries = [([actor.id], "Νέα Παράβαση Καταχωρήθηκε",
+                       f"Η παράβαση για το όχημα {violation.license_plate} καταχωρήθηκε επιτυχώς "
+                       f"στη διεύθυνση {violation.street} {violation.street_number}.", 'success')]
+        # Αν είναι admin ή poweruser, ενημέρωση και των άλλων admins/powerusers
+        if actor.role in ('admin', 'poweruser'):
+            colleagues = db.session.scalars(db.select(User.id).where(
+                User.role.in_(['admin', 'poweruser']),
+                User.id != actor.id,
+                User.is_active == True
+            )).all()
+            deliveries.append((colleagues, "Νέα Παράβαση από Συνάδελφο",
+                               f"Ο/Η {actor.full_name} κατέγραψε νέα παράβαση για το όχημα {violation.license_plate}.", 'info'))
+    
+    events = []
+    for user_ids, title, message, notification_type in deliveries:
+        create_notifications_bulk(user_ids, title, message, notification_type)
+        events.extend((user_id, 'notification', {'title': title, 'type': notification_type}) for user_id in user_ids)
+    after_commit(partial(event_broker.publish_many, events))
+
 # ======================== MAIN ROUTES ========================
 
 @app.route('/dashboard')
 @login_required
 def dashboard():
     """Κεντρικό μενού μετά το login"""
-    user = User.query.get(session['user_id'])
+    user = get_current_user()
     
-    # Στατιστικά για το dashboard
-    total_violations = Violation.query.count()
-    my_violations = Violation.query.filter_by(officer_id=user.id).count()
+    # Στατιστικά για το dashboard (από το ημερήσιο rollup)
+    summary = violation_stats_summary(officer_id=user.id)
     
     # Αδιάβαστα μηνύματα
-    unread_messages = MessageRecipient.query.filter_by(
-        recipient_id=user.id, 
-        is_read=False
-    ).count()
+    unread_messages = unread_counts(user.id)[0]
     
     stats = {
-        'total_violations': total_violations,
-        'my_violations': my_violations,
+        'total_violations': summary['total_violations'],
+        'my_violations': summary['my_violations'],
         'unread_messages': unread_messages
     }
     
@@ -579,7 +2733,7 @@ def dashboard():
 @login_required
 def new_violation():
     """Φόρμα δημιουργίας νέας παράβασης"""
-    user = User.query.get(session['user_id'])
+    user = get_current_user()
     
     # Λήψη διαθέσιμων χρωμάτων και τύπων οχημάτων
     vehicle_colors = DynamicField.query.filter_by(field_type='vehicle_color', is_active=True).all()
@@ -611,39 +2765,22 @@ def search():
 @login_required
 def statistics():
     """Σελίδα στατιστικών"""
-    user = User.query.get(session['user_id'])
+    user = get_current_user()
     
-    # Βασικά στατιστικά
-    total_violations = Violation.query.count()
-    my_violations = Violation.query.filter_by(officer_id=user.id).count()
+    # Στατιστικά παραβάσεων (από το ημερήσιο rollup)
+    summary = violation_stats_summary(officer_id=user.id)
     
     # Αδιάβαστα μηνύματα (για συμβατότητα με το template)
-    unread_messages = MessageRecipient.query.filter_by(
-        recipient_id=user.id, 
-        is_read=False
-    ).count()
-    
-    # Στατιστικά παραβάσεων
-    today_violations = Violation.query.filter(
-        Violation.violation_date == datetime.now().date()
-    ).count()
-    
-    this_month_violations = Violation.query.filter(
-        Violation.violation_date >= datetime.now().replace(day=1).date()
-    ).count()
-    
-    # Στατιστικά με φωτογραφίες και αφαιρέσεις
-    with_photos = Violation.query.filter(Violation.photo_filename != None).count()
-    with_removal = Violation.query.filter(Violation.plates_removed == True).count()
+    unread_messages = unread_counts(user.id)[0]
     
     stats = {
-        'total_violations': total_violations,
-        'my_violations': my_violations,
+        'total_violations': summary['total_violations'],
+        'my_violations': summary['my_violations'],
         'unread_messages': unread_messages,
-        'today_violations': today_violations,
-        'this_month_violations': this_month_violations,
-        'with_photos': with_photos,
-        'with_removal': with_removal
+        'today_violations': summary['today_violations'],
+        'this_month_violations': summary['month_violations'],
+        'with_photos': summary['with_photos'],
+        'with_removal': summary['with_plates_removed']
     }
     
     return render_template('dashboard/central_menu.html', user=user, stats=stats)
@@ -652,40 +2789,32 @@ def statistics():
 @login_required
 def view_violations():
     """Προβολή όλων των παραβάσεων με δυνατότητα αναζήτησης"""
-    page = request.args.get('page', 1, type=int)
+    cursor = request.args.get('cursor', '', type=str)
     search_plate = request.args.get('search_plate', '', type=str).strip()
     per_page = 50  # Αριθμός παραβάσεων ανά σελίδα
     
-    # Ξεκινάμε με το βασικό query
-    query = Violation.query
+    # Ξεκινάμε με το βασικό query (μόνο οι στήλες της λίστας)
+    query = Violation.query.options(violation_list_columns())
     
-    # Αν υπάρχει αναζήτηση, φιλτράρουμε
+    # Αν υπάρχει αναζήτηση, φιλτράρουμε στην κανονικοποιημένη (indexed) στήλη plate_key
     if search_plate:
         # Ασφαλής καθαρισμός input - μόνο alphanumeric και ελληνικά
-        import re
-        search_clean = re.sub(r'[^\w\u0370-\u03FF]', '', search_plate).upper()
+        search_clean = normalize_plate(search_plate)
         
         # Έλεγχος ότι το input δεν είναι κενό μετά τον καθαρισμό
         if search_clean:
-            # Χρήση παραμετροποιημένου query για ασφάλεια
-            search_pattern = f'%{search_clean}%'
-            query = query.filter(
-                db.func.replace(
-                    db.func.replace(
-                        db.func.upper(Violation.license_plate), ' ', ''
-                    ), '-', ''
-                ).like(search_pattern)
-            )
+            query = query.filter(plate_search_filter(search_clean))
     
-    # Παίρνουμε τις παραβάσεις με pagination
-    violations = query.order_by(Violation.id.desc()).paginate(
-        page=page, 
-        per_page=per_page, 
-        error_out=False
+    # Παίρνουμε τις παραβάσεις με keyset pagination - το σύνολο μόνο χωρίς φίλτρο (από το rollup)
+    violations = keyset_paginate(
+        query, Violation.id,
+        cursor=cursor,
+        per_page=per_page,
+        total=None if search_plate else violation_count_from_rollup()
     )
     
     # Παίρνουμε τον χρήστη
-    user = User.query.get(session['user_id'])
+    user = get_current_user()
     
     return render_template('violations_list_v2.html', violations=violations, user=user)
 
@@ -694,8 +2823,8 @@ def view_violations():
 def view_violation(violation_id):
     """Προβολή λεπτομερειών παράβασης"""
     try:
-        violation = Violation.query.get_or_404(violation_id)
-        user = User.query.get(session['user_id'])
+        violation = Violation.query.options(officer_summary()).filter_by(id=violation_id).first_or_404()
+        user = get_current_user()
         
         # Debug: Check if violation has all required attributes
         if not hasattr(violation, 'officer_id'):
@@ -713,22 +2842,13 @@ def view_violation(violation_id):
 @login_required
 def kok_module():
     """Μονάδα ΚΟΚ (Κώδικας Οδικής Κυκλοφορίας)"""
-    # Υπολογισμός στατιστικών
-    today = datetime.now().date()
-    start_of_month = today.replace(day=1)
-    
+    # Υπολογισμός στατιστικών (από το ημερήσιο rollup)
     try:
+        summary = violation_stats_summary()
         stats = {
-            'today_violations': Violation.query.filter(
-                db.func.date(Violation.violation_date) == today
-            ).count(),
-            'month_violations': Violation.query.filter(
-                Violation.violation_date >= start_of_month
-            ).count(),
-            'active_violations': Violation.query.filter(
-                Violation.fine_amount.isnot(None),
-                Violation.is_paid == False
-            ).count()
+            'today_violations': summary['today_violations'],
+            'month_violations': summary['month_violations'],
+            'active_violations': summary['with_removals']  # Επιτόπια μέτρα
         }
     except Exception as e:
         # Fallback σε περίπτωση σφάλματος
@@ -740,6 +2860,16 @@ def kok_module():
     
     return render_template('modules/kok.html', stats=stats)
 
+@app.route('/api/analytics/hotspots')
+@login_required
+def api_hotspots():
+    """Ανάλυση "πού και πότε": παραβάσεις ανά οδό × ημέρα × ώρα και κάλυψη ανά αστυνομικό"""
+    today = datetime.now().date()
+    days = request.args.get('days', app.config['HOTSPOT_DEFAULT_DAYS'], type=int)
+    days = max(1, min(days, app.config['HOTSPOT_MAX_DAYS']))
+    officer_id = request.args.get('officer_id', type=int)
+    return jsonify(hotspot_analytics(today - timedelta(days=days - 1), today, officer_id))
+
 @app.route('/elegxos')
 @login_required
 def elegxos_module():
@@ -766,14 +2896,18 @@ def messages_inbox():
     """Εισερχόμενα μηνύματα"""
     user_id = session['user_id']
     
-    # Λήψη εισερχόμενων μηνυμάτων
-    messages = db.session.query(Message, MessageRecipient)\
+    # Λήψη εισερχόμενων μηνυμάτων (keyset pagination στο message_recipient.id)
+    query = db.session.query(Message, MessageRecipient)\
         .join(MessageRecipient, Message.id == MessageRecipient.message_id)\
-        .filter(MessageRecipient.recipient_id == user_id)\
-        .order_by(Message.created_at.desc())\
-        .all()
+        .options(db.joinedload(Message.sender))\
+        .filter(MessageRecipient.recipient_id == user_id)
+    page = keyset_paginate(
+        query, MessageRecipient.id,
+        cursor=request.args.get('cursor', '', type=str),
+        key=lambda row: row[1].id
+    )
     
-    return render_template('messages/inbox.html', messages=messages)
+    return render_template('messages/inbox.html', messages=page.items, page=page)
 
 @app.route('/messages/sent')
 @login_required
@@ -781,11 +2915,21 @@ def messages_sent():
     """Απεσταλμένα μηνύματα"""
     user_id = session['user_id']
     
-    messages = Message.query.filter_by(sender_id=user_id)\
-        .order_by(Message.created_at.desc())\
-        .all()
+    page = keyset_paginate(
+        Message.query.filter_by(sender_id=user_id), Message.id,
+        cursor=request.args.get('cursor', '', type=str)
+    )
+    
+    # Πλήθος παραληπτών ανά μήνυμα με ένα GROUP BY (αντί να φορτώνονται όλοι οι παραλήπτες)
+    message_ids = [message.id for message in page.items]
+    recipient_counts = dict(
+        db.session.query(MessageRecipient.message_id, func.count(MessageRecipient.id))
+            .filter(MessageRecipient.message_id.in_(message_ids))
+            .group_by(MessageRecipient.message_id)
+            .all()
+    ) if message_ids else {}
     
-    return render_template('messages/sent.html', messages=messages)
+    return render_template('messages/sent.html', messages=page.items, page=page, recipient_counts=recipient_counts)
 
 @app.route('/messages/new', methods=['GET', 'POST'])
 @login_required
@@ -794,15 +2938,20 @@ def new_message():
     if request.method == 'POST':
         subject = request.form['subject']
         content = request.form['content']
-        recipient_ids = request.form.getlist('recipients')
+        # Μοναδικοί παραλήπτες με τη σειρά επιλογής
+        recipient_ids = list(dict.fromkeys(
+            int(recipient_id) for recipient_id in request.form.getlist('recipients') if recipient_id.isdigit()
+        ))
         
         if not recipient_ids:
             flash('Παρακαλώ επιλέξτε τουλάχιστον έναν παραλήπτη.', 'warning')
             return redirect(url_for('new_message'))
         
+        sender = get_current_user()
+        
         # Δημιουργία μηνύματος
         message = Message(
-            sender_id=session['user_id'],
+            sender_id=sender.id,
             subject=subject,
             content=content,
             is_mass_message=len(recipient_ids) > 1
@@ -810,30 +2959,32 @@ def new_message():
         db.session.add(message)
         db.session.flush()  # Για να πάρουμε το message_id
         
-        # Προσθήκη παραληπτών
-        for recipient_id in recipient_ids:
-            recipient = MessageRecipient(
-                message_id=message.id,
-                recipient_id=int(recipient_id)
-            )
-            db.session.add(recipient)
-            
-            # Δημιουργία ειδοποίησης για το νέο μήνυμα
-            sender_name = User.query.get(session['user_id']).full_name
-            create_notification(
-                user_id=int(recipient_id),
-                title="Νέο Μήνυμα",
-                message=f"Έχετε λάβει νέο μήνυμα από {sender_name}: {subject}",
-                notification_type='message',
-                related_message_id=message.id
-            )
+        # Παραλήπτες και ειδοποιήσεις ως δύο bulk inserts στο ίδιο transaction
+        db.session.execute(db.insert(MessageRecipient), [
+            {'message_id': message.id, 'recipient_id': recipient_id} for recipient_id in recipient_ids
+        ])
+        create_notifications_bulk(
+            recipient_ids,
+            title="Νέο Μήνυμα",
+            message=f"Έχετε λάβει νέο μήνυμα από {sender.full_name}: {subject}",
+            notification_type='message',
+            related_message_id=message.id
+        )
+        adjust_unread_counters(recipient_ids, messages=1)
         
         db.session.commit()
+        event_broker.publish_many(
+            (recipient_id, event, data)
+            for recipient_id in recipient_ids
+            for event, data in (('message', {'message_id': message.id}),
+                                ('notification', {'title': "Νέο Μήνυμα", 'type': 'message'}))
+        )
+        
         flash('Το μήνυμα στάλθηκε επιτυχώς!', 'success')
         return redirect(url_for('messages_sent'))
     
     # Λήψη διαθέσιμων παραληπτών
-    current_user = User.query.get(session['user_id'])
+    current_user = get_current_user()
     recipients = User.query.filter(
         User.id != session['user_id'],
         User.is_active == True
@@ -855,16 +3006,15 @@ def view_message(message_id):
         recipient_id=user_id
     ).first()
     
-    message = Message.query.get_or_404(message_id)
-    
-    if not message_recipient and message.sender_id != user_id:
-        flash('Δεν έχετε δικαίωμα προβολής αυτού του μηνύματος.', 'danger')
-        return redirect(url_for('messages_inbox'))
-    
-    # Σήμανση ως διαβασμένο αν είναι παραλήπτης
+    # Σήμανση ως διαβασμένο αν είναι παραλήπτης (πριν τη φόρτωση του μηνύματος, ώστε το commit
+    # να μην κάνει expire τις eager φορτωμένες σχέσεις που χρειάζεται το template)
+    # Conditional UPDATEs: οι μετρητές αδιάβαστων μειώνονται μόνο κατά όσες γραμμές άλλαξαν πραγματικά
     if message_recipient and not message_recipient.is_read:
-        message_recipient.is_read = True
-        message_recipient.read_at = datetime.utcnow()
+        messages_marked = db.session.execute(
+            db.update(MessageRecipient)
+                .where(MessageRecipient.id == message_recipient.id, MessageRecipient.is_read == False)
+                .values(is_read=True, read_at=datetime.utcnow())
+        ).rowcount
         
         # Σήμανση της αντίστοιχης ειδοποίησης ως διαβασμένη
         notification = Notification.query.filter_by(
@@ -873,10 +3023,32 @@ def view_message(message_id):
             is_read=False
         ).first()
         
+        notifications_marked = 0
         if notification:
-            notification.is_read = True
+            notifications_marked = db.session.execute(
+                db.update(Notification)
+                    .where(Notification.id == notification.id, Notification.is_read == False)
+                    .values(is_read=True)
+            ).rowcount
         
+        adjust_unread_counters([user_id], messages=-messages_marked, notifications=-notifications_marked)
         db.session.commit()
+        db.session.refresh(message_recipient)
+        event_broker.publish(user_id, 'message', {'message_id': message_id, 'read': True})
+        if notification:
+            event_broker.publish(user_id, 'notification', {'id': notification.id, 'read': True})
+    
+    message = Message.query.options(db.joinedload(Message.sender)).filter_by(id=message_id).first_or_404()
+    
+    if not message_recipient and message.sender_id != user_id:
+        flash('Δεν έχετε δικαίωμα προβολής αυτού του μηνύματος.', 'danger')
+        return redirect(url_for('messages_inbox'))
+    
+    if message.sender_id == user_id:
+        # Ο αποστολέας βλέπει τη λίστα παραληπτών - φόρτωση μαζί με τους χρήστες σε ένα query
+        Message.query.options(
+            db.selectinload(Message.recipients).joinedload(MessageRecipient.recipient_user)
+        ).filter_by(id=message_id).first()
     
     return render_template('messages/view_message.html', 
                          message=message, 
@@ -889,22 +3061,20 @@ def view_message(message_id):
 @admin_required
 def admin_dashboard():
     """Admin Dashboard"""
-    current_user = User.query.get(session['user_id'])
+    current_user = get_current_user()
     
     # Στατιστικά
     total_users = User.query.count()
-    total_violations = Violation.query.count()
     total_messages = Message.query.count()
     
-    # Παραβάσεις σήμερα
-    from datetime import date
-    today = date.today()
-    today_violations = Violation.query.filter(
-        db.func.date(Violation.violation_date) == today
-    ).count()
+    # Παραβάσεις συνολικά και σήμερα (από το ημερήσιο rollup)
+    summary = violation_stats_summary()
+    total_violations = summary['total_violations']
+    today_violations = summary['today_violations']
     
     # Πρόσφατες δραστηριότητες
-    recent_violations = Violation.query.order_by(Violation.created_at.desc()).limit(5).all()
+    recent_violations = Violation.query.options(violation_list_columns(), officer_summary())\
+        .order_by(Violation.created_at.desc()).limit(5).all()
     recent_users = User.query.order_by(User.created_at.desc()).limit(5).all()
     
     stats = {
@@ -927,7 +3097,7 @@ def admin_dashboard():
 @admin_required
 def admin_users():
     """Διαχείριση χρηστών"""
-    current_user = User.query.get(session['user_id'])
+    current_user = get_current_user()
     users = User.query.order_by(User.created_at.desc()).all()
     return render_template('admin/users.html', users=users, current_user=current_user)
 
@@ -964,6 +3134,7 @@ def add_user():
             
             db.session.add(user)
             db.session.commit()
+            invalidate_identity_snapshots()
             
             flash(f'Ο χρήστης {user.full_name} δημιουργήθηκε επιτυχώς!', 'success')
             return redirect(url_for('admin_users'))
@@ -975,7 +3146,36 @@ def add_user():
 @admin_required
 def admin_violations():
     """Διαχείριση εκθέσεων παραβάσεων"""
-    return render_template('admin/violations.html')
+    current_user = get_current_user()
+    
+    plate_key = normalize_plate(request.args.get('license_plate', '', type=str))
+    officer_id = request.args.get('officer_id', type=int)
+    try:
+        start_date = datetime.strptime(request.args['start_date'], '%Y-%m-%d').date() if request.args.get('start_date') else None
+        end_date = datetime.strptime(request.args['end_date'], '%Y-%m-%d').date() if request.args.get('end_date') else None
+    except ValueError:
+        flash('Μη έγκυρη ημερομηνία φίλτρου.', 'warning')
+        start_date = end_date = None
+    
+    query = Violation.query.options(violation_list_columns(), officer_summary())
+    if plate_key:
+        query = query.filter(plate_search_filter(plate_key))
+    if officer_id:
+        query = query.filter(Violation.officer_id == officer_id)
+    if start_date:
+        query = query.filter(Violation.violation_date >= start_date)
+    if end_date:
+        query = query.filter(Violation.violation_date <= end_date)
+    
+    # Το σύνολο από το rollup όταν δεν υπάρχει φίλτρο πινακίδας
+    total = None if plate_key else violation_count_from_rollup(officer_id, start_date, end_date)
+    violations = keyset_paginate(
+        query, Violation.id,
+        cursor=request.args.get('cursor', '', type=str),
+        total=total
+    )
+    
+    return render_template('admin/violations.html', violations=violations, current_user=current_user)
 
 @app.route('/admin/violation-types')
 @login_required
@@ -1013,6 +3213,7 @@ def admin_violation_types_new():
             
             db.session.add(violation)
             db.session.commit()
+            invalidate_fine_tariff()
             
             flash(f'Ο τύπος παράβασης "{violation.description}" προστέθηκε επιτυχώς!', 'success')
             return redirect(url_for('admin_violation_types'))
@@ -1051,6 +3252,7 @@ def admin_violation_types_edit(violation_id):
             violation.updated_at = datetime.now()
             
             db.session.commit()
+            invalidate_fine_tariff()
             
             flash(f'Ο τύπος παράβασης "{violation.description}" ενημερώθηκε επιτυχώς!', 'success')
             return redirect(url_for('admin_violation_types'))
@@ -1073,6 +3275,7 @@ def admin_violation_types_delete(violation_id):
         violation.is_active = False
         violation.updated_at = datetime.now()
         db.session.commit()
+        invalidate_fine_tariff()
         
         flash(f'Ο τύπος παράβασης "{violation.description}" διαγράφηκε επιτυχώς!', 'success')
     except Exception as e:
@@ -1086,13 +3289,89 @@ def admin_violation_types_delete(violation_id):
 @admin_required
 def admin_reports():
     """Αναφορές και στατιστικά"""
-    return render_template('admin/reports.html')
+    violation_types = ViolationsData.query.options(db.load_only(ViolationsData.id, ViolationsData.description))\
+        .order_by(ViolationsData.description).all()
+    return render_template('admin/reports.html', violation_types=violation_types)
+
+@app.route('/admin/reports/generate', methods=['POST'])
+@admin_required
+def admin_generate_report():
+    """Αναφορά παραβάσεων: εκτυπώσιμη σελίδα με συγκεντρωτικά ή streamed εξαγωγή CSV/XLSX"""
+    try:
+        filters = parse_report_filters(request.form)
+    except ReportError as e:
+        flash(str(e), 'danger')
+        return redirect(url_for('admin_reports'))
+    
+    export_format = request.form.get('format', 'html')
+    filename = f"anafora_paravaseon_{filters['start_date']:%Y%m%d}_{filters['end_date']:%Y%m%d}"
+    if export_format == 'csv':
+        return Response(
+            stream_with_context(report_csv_chunks(filters)),
+            mimetype='text/csv',
+            headers={'Content-Disposition': f'attachment; filename={filename}.csv'}
+        )
+    if export_format == 'xlsx':
+        return Response(
+            stream_with_context(report_xlsx_chunks(filters)),
+            mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+            headers={'Content-Disposition': f'attachment; filename={filename}.xlsx'}
+        )
+    
+    officer = db.session.get(User, filters['officer_id']) if filters['officer_id'] else None
+    violation_type = db.session.get(ViolationsData, filters['violations_data_id']) if filters['violations_data_id'] else None
+    return render_template('admin/report_result.html',
+                         filters=filters,
+                         officer=officer,
+                         violation_type=violation_type,
+                         summary=report_summary(filters),
+                         generated_at=datetime.now())
+
+@app.route('/api/officers')
+@admin_required
+def api_officers():
+    """Λίστα αστυνομικών για τα φίλτρα αναφορών"""
+    officers = User.query.options(db.load_only(User.id, User.rank, User.first_name, User.last_name))\
+        .order_by(User.last_name, User.first_name).all()
+    return jsonify([{'id': officer.id, 'full_name': officer.full_name} for officer in officers])
+
+@app.route('/api/reports/quick-stats')
+@admin_required
+def api_report_quick_stats():
+    """Γρήγορα στατιστικά της σελίδας αναφορών (από το ημερήσιο rollup και το violation_item)"""
+    today = datetime.now().date()
+    month_start = today.replace(day=1)
+    
+    top_officer = db.session.query(User.rank, User.first_name, User.last_name,
+                                   func.sum(ViolationDailyStats.violations_count).label('total'))\
+        .join(User, User.id == ViolationDailyStats.officer_id)\
+        .filter(ViolationDailyStats.stat_date >= month_start)\
+        .group_by(User.id, User.rank, User.first_name, User.last_name)\
+        .order_by(db.desc('total')).first()
+    
+    by_type = violation_item_aggregates('type', start_date=month_start, end_date=today)
+    items_total = sum(row['count'] for row in by_type)
+    top_violation = by_type[0] if by_type else None
+    
+    return jsonify({
+        'today': violation_count_from_rollup(start_date=today, end_date=today),
+        'week': violation_count_from_rollup(start_date=today - timedelta(days=6), end_date=today),
+        'month': violation_count_from_rollup(start_date=month_start, end_date=today),
+        'top_officer': {
+            'name': f"{top_officer.rank} {top_officer.first_name} {top_officer.last_name}",
+            'count': int(top_officer.total)
+        } if top_officer else None,
+        'top_violation': {
+            'description': top_violation['label'],
+            'percent': round(100 * top_violation['count'] / items_total) if items_total else 0
+        } if top_violation else None,
+    })
 
 @app.route('/admin/fines-management')
 @login_required
 def admin_fines_management():
     """Διαχείριση Προστίμων - Κεντρική σελίδα"""
-    user = User.query.get(session['user_id'])
+    user = get_current_user()
     if not user or not user.can_view_admin_dashboard():
         flash('Δεν έχετε δικαίωμα πρόσβασης σε αυτή τη σελίδα.', 'error')
         return redirect(url_for('dashboard'))
@@ -1104,7 +3383,7 @@ def admin_fines_management():
 @login_required
 def admin_edit_fine(violation_id):
     """Επεξεργασία στοιχείων παράβασης/προστίμου"""
-    user = User.query.get(session['user_id'])
+    user = get_current_user()
     if not user or not user.can_view_admin_dashboard():
         flash('Δεν έχετε δικαίωμα πρόσβασης σε αυτή τη σελίδα.', 'error')
         return redirect(url_for('dashboard'))
@@ -1143,6 +3422,7 @@ def admin_edit_fine(violation_id):
             violation_data.updated_at = datetime.utcnow()
             
             db.session.commit()
+            invalidate_fine_tariff()
             flash('Τα στοιχεία του προστίμου ενημερώθηκαν επιτυχώς!', 'success')
             return redirect(url_for('admin_fines_management'))
             
@@ -1157,7 +3437,7 @@ def admin_edit_fine(violation_id):
 @login_required
 def admin_new_fine():
     """Δημιουργία νέου τύπου παράβασης/προστίμου"""
-    user = User.query.get(session['user_id'])
+    user = get_current_user()
     if not user or not user.can_view_admin_dashboard():
         flash('Δεν έχετε δικαίωμα πρόσβασης σε αυτή τη σελίδα.', 'error')
         return redirect(url_for('dashboard'))
@@ -1183,6 +3463,7 @@ def admin_new_fine():
             
             db.session.add(new_violation)
             db.session.commit()
+            invalidate_fine_tariff()
             flash('Ο νέος τύπος παράβασης δημιουργήθηκε επιτυχώς!', 'success')
             return redirect(url_for('admin_fines_management'))
             
@@ -1207,6 +3488,44 @@ def violations_search():
     """Αναζήτηση παραβάσεων"""
     return redirect(url_for('view_violations'))
 
+def lookup_plate_violations(plate_key):
+    """Οι 10 πιο πρόσφατες παραβάσεις για την πινακίδα, με τα ονόματα αστυνομικών σε ένα joined query"""
+    rows = db.session.query(Violation, User.first_name, User.last_name)\
+        .options(violation_list_columns())\
+        .outerjoin(User, User.id == Violation.officer_id)\
+        .filter(plate_search_filter(plate_key))\
+        .order_by(Violation.created_at.desc())\
+        .limit(10).all()
+    
+    violations_list = []
+    for v, first_name, last_name in rows:
+        officer_name = f"{first_name} {last_name}" if first_name is not None else 'Άγνωστος'
+        
+        # Λήψη στοιχείων επιλεγμένων παραβάσεων
+        selected_violations = v.get_selected_violations_list()
+        violation_description = ', '.join([str(viol_id) for viol_id in selected_violations]) if selected_violations else 'Άγνωστος τύπος'
+        
+        violations_list.append({
+            'id': v.id,
+            'violation_date': v.violation_date.strftime('%d/%m/%Y') if v.violation_date else 'Άγνωστη ημερομηνία',
+            'violation_time': v.violation_time.strftime('%H:%M') if v.violation_time else 'Άγνωστη ώρα',
+            'violation_type': violation_description,
+            'officer': officer_name,
+            'fine_amount': str(v.total_fine_amount) if v.total_fine_amount else '0'
+        })
+    
+    # Στοιχεία από την πιο πρόσφατη παράβαση για αυτόματη συμπλήρωση
+    auto_fill_data = None
+    if rows:
+        latest_violation = rows[0][0]
+        auto_fill_data = {
+            'vehicle_brand': latest_violation.vehicle_brand,
+            'vehicle_color': latest_violation.vehicle_color,
+            'vehicle_type': latest_violation.vehicle_type
+        }
+    
+    return {'violations': violations_list, 'auto_fill_data': auto_fill_data}
+
 @app.route('/api/search_license_plate', methods=['POST'])
 @login_required
 def search_license_plate():
@@ -1218,45 +3537,23 @@ def search_license_plate():
         if not license_plate:
             return jsonify({'success': False, 'message': 'Δεν δόθηκε πινακίδα'})
         
-        # Case-insensitive αναζήτηση όλων των παραβάσεων για αυτή την πινακίδα
-        violations = Violation.query.filter(
-            Violation.license_plate.ilike(f'%{license_plate}%')
-        ).order_by(Violation.created_at.desc()).limit(10).all()
+        plate_key = normalize_plate(license_plate)
+        if not plate_key:
+            return jsonify({'success': False, 'message': 'Δεν δόθηκε πινακίδα'})
+        
+        result = plate_lookup_cache.get(plate_key)
+        if result is None:
+            result = lookup_plate_violations(plate_key)
+            plate_lookup_cache.set(plate_key, result)
         
-        if violations:
-            # Πάρε στοιχεία από την πιο πρόσφατη παράβαση για αυτόματη συμπλήρωση
-            latest_violation = violations[0]
-            
-            violations_list = []
-            for v in violations:
-                # Λήψη στοιχείων χρήστη
-                user = User.query.get(v.officer_id)
-                officer_name = f"{user.first_name} {user.last_name}" if user else 'Άγνωστος'
-                
-                # Λήψη στοιχείων επιλεγμένων παραβάσεων
-                selected_violations = v.get_selected_violations_list()
-                violation_description = ', '.join([str(viol_id) for viol_id in selected_violations]) if selected_violations else 'Άγνωστος τύπος'
-                
-                violations_list.append({
-                    'id': v.id,
-                    'violation_date': v.violation_date.strftime('%d/%m/%Y') if v.violation_date else 'Άγνωστη ημερομηνία',
-                    'violation_time': v.violation_time.strftime('%H:%M') if v.violation_time else 'Άγνωστη ώρα',
-                    'violation_type': violation_description,
-                    'officer': officer_name,
-                    'fine_amount': str(v.total_fine_amount) if v.total_fine_amount else '0'
-                })
-            
+        if result['violations']:
             return jsonify({
                 'success': True,
                 'found': True,
-                'auto_fill_data': {
-                    'vehicle_brand': latest_violation.vehicle_brand,
-                    'vehicle_color': latest_violation.vehicle_color, 
-                    'vehicle_type': latest_violation.vehicle_type
-                },
-                'violations': violations_list,
-                'total_violations': len(violations_list),
-                'message': f'Βρέθηκαν {len(violations_list)} παραβάσεις για την πινακίδα {license_plate}'
+                'auto_fill_data': result['auto_fill_data'],
+                'violations': result['violations'],
+                'total_violations': len(result['violations']),
+                'message': f'Βρέθηκαν {len(result["violations"])} παραβάσεις για την πινακίδα {license_plate}'
             })
         else:
             return jsonify({
@@ -1275,47 +3572,33 @@ def search_license_plate():
 def violations_stats():
     """Στατιστικά παραβάσεων"""
     try:
-        user = User.query.get(session['user_id'])
+        user = get_current_user()
         if not user:
             flash('Σφάλμα: Χρήστης δεν βρέθηκε', 'error')
             return redirect(url_for('dashboard'))
         
-        # Βασικά στατιστικά
-        stats = {}
-        stats['total_violations'] = Violation.query.count() or 0
-        
-        # Date statistics με ασφαλή τρόπο
-        from datetime import date
-        today = date.today()
-        month_start = today.replace(day=1)
-        
-        # Στατιστικά ημέρας (χρήση string comparison αντί για func.date)
-        stats['today_violations'] = Violation.query.filter(
-            Violation.violation_date == today
-        ).count() or 0
-        
-        # Στατιστικά μήνα
-        stats['month_violations'] = Violation.query.filter(
-            Violation.violation_date >= month_start
-        ).count() or 0
-        
-        stats['violations_with_photos'] = Violation.query.filter(Violation.photo_filename != None).count() or 0
-        
-        # Παραβάσεις με επιτόπια μέτρα (πινακίδες, άδεια, κυκλοφορία)
-        stats['violations_with_removals'] = Violation.query.filter(
-            or_(
-                Violation.plates_removed == True,
-                Violation.license_removed == True, 
-                Violation.registration_removed == True
-            )
-        ).count() or 0
+        # Βασικά στατιστικά (από το ημερήσιο rollup)
+        summary = violation_stats_summary()
+        stats = {
+            'total_violations': summary['total_violations'],
+            'today_violations': summary['today_violations'],
+            'month_violations': summary['month_violations'],
+            'violations_with_photos': summary['with_photos'],
+            # Παραβάσεις με επιτόπια μέτρα (πινακίδες, άδεια, κυκλοφορία)
+            'violations_with_removals': summary['with_removals']
+        }
+        
+        # Παραβάσεις του τρέχοντος μήνα ανά άρθρο (ένα GROUP BY στο violation_item)
+        today = datetime.now().date()
+        articles = violation_item_aggregates('article', start_date=today.replace(day=1), end_date=today, limit=15)
         
         # Μη διαβασμένα μηνύματα - διορθώθηκε για συνέπεια
-        unread_messages = MessageRecipient.query.filter_by(recipient_id=user.id, is_read=False).count() or 0
+        unread_messages = unread_counts(user.id)[0]
         
         return render_template('violations_stats.html', 
                              user=user, 
                              stats=stats, 
+                             articles=articles,
                              unread_messages=unread_messages)
     
     except Exception as e:
@@ -1326,15 +3609,15 @@ def violations_stats():
 @login_required
 def edit_violation(violation_id):
     """Φόρμα επεξεργασίας παράβασης - μόνο για admin"""
-    user = User.query.get(session['user_id'])
+    user = get_current_user()
     
     # Έλεγχος αν ο χρήστης μπορεί να επεξεργαστεί παραβάσεις
     if not user.can_manage_users():
         flash('Δεν έχετε δικαίωμα επεξεργασίας παραβάσεων.', 'error')
         return redirect(url_for('view_violations'))
     
-    # Λήψη παράβασης
-    violation = Violation.query.get_or_404(violation_id)
+    # Λήψη παράβασης (μαζί με τις deferred στήλες άρθρων/ανάλυσης προστίμων)
+    violation = Violation.query.options(db.undefer_group('details')).filter_by(id=violation_id).first_or_404()
     
     # Λήψη διαθέσιμων χρωμάτων και τύπων οχημάτων
     vehicle_colors = DynamicField.query.filter_by(field_type='vehicle_color', is_active=True).all()
@@ -1358,7 +3641,7 @@ def edit_violation(violation_id):
 @login_required
 def update_violation(violation_id):
     """Ενημέρωση παράβασης - μόνο για admin"""
-    user = User.query.get(session['user_id'])
+    user = get_current_user()
     
     # Έλεγχος αν ο χρήστης μπορεί να επεξεργαστεί παραβάσεις
     if not user.can_manage_users():
@@ -1420,7 +3703,10 @@ def update_violation(violation_id):
         driver_afm = request.form.get('driver_afm', '').strip() or None
         
         # Ενημέρωση παράβασης
+        previous_plate_key = normalize_plate(violation.license_plate)
+        previous_stats = violation_stats_contribution(violation)
         violation.license_plate = license_plate
+        violation.plate_key = normalize_plate(license_plate)
         violation.vehicle_brand = vehicle_brand
         violation.vehicle_color = vehicle_color
         violation.vehicle_type = vehicle_type
@@ -1429,6 +3715,9 @@ def update_violation(violation_id):
         violation.street = street
         violation.street_number = street_number
         violation.selected_violations = json.dumps(selected_violations)
+        total_fine, violation_articles_list, violation.items = calculate_fines(selected_violations, vehicle_type)
+        violation.violation_articles = json.dumps(violation_articles_list) if violation_articles_list else None
+        violation.total_fine_amount = total_fine if total_fine > 0 else None
         violation.plates_removed = plates_removed
         violation.license_removed = license_removed
         violation.registration_removed = registration_removed
@@ -1440,16 +3729,11 @@ def update_violation(violation_id):
         violation.driver_afm = driver_afm
         
         violation.updated_at = datetime.utcnow()
+        enqueue_daily_stats(new=violation_stats_contribution(violation), old=previous_stats)
+        enqueue_job('violation_notifications', violation_id=violation_id, actor_id=session['user_id'], action='updated')
         
         db.session.commit()
-        
-        # Δημιουργία notification για την επεξεργασία
-        create_notification(
-            user_id=session['user_id'],
-            title="Παράβαση Ενημερώθηκε",
-            message=f"Η παράβαση #{violation_id} για το όχημα {license_plate} ενημερώθηκε επιτυχώς.",
-            notification_type="info"
-        )
+        invalidate_plate_lookups(previous_plate_key, violation.plate_key)
         
         flash('Η παράβαση ενημερώθηκε επιτυχώς!', 'success')
         return redirect(url_for('view_violations'))
@@ -1523,50 +3807,34 @@ def submit_violation():
         license_removed = 'license_removed' in request.form  
         registration_removed = 'registration_removed' in request.form
         
-        # Υπολογισμός άρθρων και συνολικού ποσού παραβάσεων
-        total_fine = 0
-        violation_articles_list = []
+        # Υπολογισμός άρθρων και συνολικού ποσού παραβάσεων (από τον cached πίνακα προστίμων)
+        total_fine, violation_articles_list, violation_items = calculate_fines(selected_violations, vehicle_type)
         
-        for violation_id in selected_violations:
-            try:
-                violation_data = ViolationsData.query.get(int(violation_id))
-                if violation_data:
-                    # Προσθήκη άρθρου στη λίστα
-                    if violation_data.article and violation_data.article.strip():
-                        article_text = violation_data.article.strip()
-                        if violation_data.article_paragraph and violation_data.article_paragraph.strip():
-                            article_text += f" παρ. {violation_data.article_paragraph.strip()}"
-                        violation_articles_list.append(article_text)
-                    
-                    # Υπολογισμός ποσού βάσει τύπου οχήματος
-                    if vehicle_type.lower() in ['αυτοκίνητο', 'αυτοκινητο', 'car', 'automobile']:
-                        if violation_data.fine_cars:
-                            total_fine += float(violation_data.fine_cars)
-                    elif vehicle_type.lower() in ['μοτοσικλέτα', 'μοτοσικλετα', 'motorcycle', 'bike']:
-                        if violation_data.fine_motorcycles:
-                            fine_amount = float(violation_data.fine_motorcycles)
-                            # Έλεγχος για μισό πρόστιμο
-                            if violation_data.half_fine_motorcycles:
-                                fine_amount = fine_amount / 2
-                            total_fine += fine_amount
-                        elif violation_data.fine_cars:  # Fallback to car fine if motorcycle fine not available
-                            total_fine += float(violation_data.fine_cars)
-                    elif vehicle_type.lower() in ['φορτηγό', 'φορτηγο', 'truck']:
-                        if violation_data.fine_trucks:
-                            total_fine += float(violation_data.fine_trucks)
-                        elif violation_data.fine_cars:  # Fallback to car fine if truck fine not available
-                            total_fine += float(violation_data.fine_cars)
-                    else:
-                        # Default to car fine for unknown vehicle types
-                        if violation_data.fine_cars:
-                            total_fine += float(violation_data.fine_cars)
-            except (ValueError, AttributeError) as e:
-                logger.warning(f"Error processing violation {violation_id}: {str(e)}")
-                continue
+        # Φωτογραφία: το πρωτότυπο γράφεται στον δίσκο τώρα, τα thumbnails/WebP στο παρασκήνιο
+        try:
+            photo_filename = save_violation_photo(request.files.get('photo_file'), request.form.get('photo_data'))
+        except PhotoError as e:
+            db.session.rollback()
+            flash(str(e), 'error')
+            return redirect(url_for('new_violation'))
+        
+        # Στοιχεία και υπογραφή οδηγού (μόνο αν ήταν παρών)
+        driver_present = 'driver_present' in request.form
+        driver_fields = {
+            field: (request.form.get(field, '').strip() or None) if driver_present else None
+            for field in ('driver_last_name', 'driver_first_name', 'driver_father_name', 'driver_afm')
+        }
+        try:
+            driver_signature_key = store_driver_signature(request.form.get('signature_data')) if driver_present else None
+        except PhotoError as e:
+            db.session.rollback()
+            flash(str(e), 'error')
+            return redirect(url_for('new_violation'))
         
         # Δημιουργία παράβασης
         violation = Violation(
             license_plate=license_plate,
+            plate_key=normalize_plate(license_plate),
             vehicle_brand=vehicle_brand,
             vehicle_color=vehicle_color,
             vehicle_type=vehicle_type,
@@ -1580,36 +3848,23 @@ def submit_violation():
             plates_removed=plates_removed,
             license_removed=license_removed,
             registration_removed=registration_removed,
-            officer_id=session['user_id']
+            photo_filename=photo_filename,
+            driver_signature_key=driver_signature_key,
+            items=violation_items,
+            officer_id=session['user_id'],
+            **driver_fields
         )
         
         db.session.add(violation)
+        enqueue_daily_stats(new=violation_stats_contribution(violation))
+        if photo_filename:
+            schedule_photo_processing(photo_filename)
+        db.session.flush()
+        # Ειδοποιήσεις (αστυνομικός και λοιποί admins/powerusers) από τον job worker, όχι 1 + N commits εδώ
+        enqueue_job('violation_notifications', violation_id=violation.id, actor_id=session['user_id'], action='created')
         db.session.commit()
-        
-        # Δημιουργία notification για τον χρήστη
-        user = User.query.get(session['user_id'])
-        create_notification(
-            user_id=session['user_id'],
-            title="Νέα Παράβαση Καταχωρήθηκε",
-            message=f"Η παράβαση για το όχημα {license_plate} καταχωρήθηκε επιτυχώς στη διεύθυνση {street} {street_number}.",
-            notification_type="success"
-        )
-        
-        # Αν είναι admin ή poweruser, ενημέρωση και άλλων admins
-        if user.role in ['admin', 'poweruser']:
-            other_admins = User.query.filter(
-                User.role.in_(['admin', 'poweruser']),
-                User.id != session['user_id'],
-                User.is_active == True
-            ).all()
-            
-            for admin in other_admins:
-                create_notification(
-                    user_id=admin.id,
-                    title="Νέα Παράβαση από Συνάδελφο",
-                    message=f"Ο/Η {user.full_name} κατέγραψε νέα παράβαση για το όχημα {license_plate}.",
-                    notification_type="info"
-                )
+        violations_submitted.inc()
+        invalidate_plate_lookups(violation.plate_key)
         
         flash('Η παράβαση καταχωρήθηκε επιτυχώς!', 'success')
         return redirect(url_for('view_violations'))
@@ -1620,5 +3875,419 @@ def submit_violation():
         flash(f'Σφάλμα κατά την καταχώρηση: {str(e)}', 'error')
         return redirect(url_for('new_violation'))
 
+
+# ======================== SYNTHETIC DATA ========================
+
+SEED_PLATE_LETTERS = 'ΑΒΕΖΗΙΚΜΝΟΡΤΥΧ'  # Τα γράμματα των ελληνικών πινακίδων (κοινά με το λατινικό αλφάβητο)
+SEED_STREETS = [
+    'Ερμού', 'Πανεπιστημίου', 'Σταδίου', 'Ακαδημίας', 'Πατησίων', 'Αθηνάς', 'Μητροπόλεως', 'Κηφισίας',
+    'Βασ. Σοφίας', 'Αλεξάνδρας', 'Συγγρού', 'Πειραιώς', 'Αγίου Κωνσταντίνου', 'Μιχαλακοπούλου', 'Ιπποκράτους',
+    'Σόλωνος', 'Σκουφά', 'Τσιμισκή', 'Εγνατίας', 'Αριστοτέλους', 'Καραϊσκάκη', 'Κολοκοτρώνη', 'Ελ. Βενιζέλου',
+    'Μεγάλου Αλεξάνδρου', 'Δημοκρατίας', '28ης Οκτωβρίου', 'Εθνικής Αντιστάσεως', 'Παπαναστασίου', 'Κεντρικής Πλατείας',
+    'Ηρώων Πολυτεχνείου', 'Αγίας Σοφίας', 'Λεωφ. Νίκης', 'Θεμιστοκλέους', 'Μαιζώνος', 'Κανάρη', 'Ανδρέα Παπανδρέου',
+]
+SEED_BRANDS = ['Toyota', 'Volkswagen', 'Fiat', 'Opel', 'Peugeot', 'Hyundai', 'Nissan', 'Renault', 'Ford', 'Kia',
+               'Suzuki', 'Citroen', 'Skoda', 'BMW', 'Mercedes', 'Audi', 'Seat', 'Honda', 'Yamaha', 'Piaggio']
+SEED_COLORS = ['Λευκό', 'Μαύρο', 'Γκρι', 'Ασημί', 'Μπλε', 'Κόκκινο', 'Πράσινο', 'Κίτρινο', 'Καφέ', 'Μπεζ']
+SEED_VEHICLE_TYPES = [('Αυτοκίνητο', 0.75), ('Μοτοσικλέτα', 0.18), ('Φορτηγό', 0.07)]
+SEED_FIRST_NAMES = ['Γεώργιος', 'Ιωάννης', 'Κωνσταντίνος', 'Δημήτριος', 'Νικόλαος', 'Παναγιώτης', 'Βασίλειος',
+                    'Χρήστος', 'Μαρία', 'Ελένη', 'Αικατερίνη', 'Βασιλική', 'Σοφία', 'Αγγελική', 'Γεωργία', 'Δέσποινα']
+SEED_LAST_NAMES = ['Παπαδόπουλος', 'Βασιλείου', 'Νικολάου', 'Γεωργίου', 'Οικονόμου', 'Παπαγεωργίου', 'Μακρής',
+                   'Δημητρίου', 'Ιωάννου', 'Κωνσταντίνου', 'Αλεξίου', 'Παππάς', 'Αντωνίου', 'Χριστοδούλου']
+SEED_RANKS = ['Δημοτικός Αστυνομικός', 'Υπαρχιφύλακας', 'Αρχιφύλακας', 'Επόπτης']
+SEED_SUBJECTS = ['Αλλαγή βάρδιας', 'Έλεγχος στάθμευσης στο κέντρο', 'Ενημέρωση για τον ΚΟΚ', 'Σύσκεψη προσωπικού',
+                 'Εκκρεμείς κλήσεις', 'Πρόγραμμα εξορμήσεων', 'Αναφορά συμβάντος', 'Οδηγίες για θέσεις ΑμεΑ']
+# Κατανομή ωρών: αιχμές το πρωί (εμπορικά) και το απόγευμα, ελάχιστες παραβάσεις τη νύχτα
+SEED_HOUR_WEIGHTS = [1, 1, 1, 1, 1, 2, 4, 8, 12, 14, 15, 15, 14, 12, 9, 7, 7, 9, 11, 11, 9, 6, 3, 2]
+SEED_WEEKDAY_WEIGHTS = [1.0, 1.05, 1.05, 1.05, 1.1, 0.8, 0.35]  # Δευτέρα ... Κυριακή
+
+def _weights(values):
+    weights = np.asarray(values, dtype=float)
+    return weights / weights.sum()
+
+def _zipf_weights(count, exponent=1.1):
+    return _weights(1.0 / np.arange(1, count + 1) ** exponent)
+
+def bulk_insert(table, columns, rows):
+    """Μαζική εισαγωγή στο τρέχον transaction: COPY στην PostgreSQL, executemany στις υπόλοιπες βάσεις"""
+    if not rows:
+        return
+    connection = db.session.connection()
+    if connection.dialect.name == 'postgresql':
+        preparer = connection.dialect.identifier_preparer
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(rows)
+        buffer.seek(0)
+        cursor = connection.connection.cursor()
+        try:
+            cursor.copy_expert(
+                f"COPY {preparer.format_table(table)} ({', '.join(preparer.quote(column) for column in columns)}) "
+                f"FROM STDIN WITH (FORMAT csv)",
+                buffer
+            )
+        finally:
+            cursor.close()
+    else:
+        connection.execute(table.insert(), [dict(zip(columns, row)) for row in rows])
+
+def _reset_sequence(table):
+    """PostgreSQL: συγχρονισμός του serial μετά από εισαγωγή με ρητά ids"""
+    if db.engine.dialect.name == 'postgresql':
+        db.session.execute(db.text(
+            f"SELECT setval(pg_get_serial_sequence('{table.name}', 'id'), COALESCE((SELECT MAX(id) FROM {table.name}), 1))"
+        ))
+
+def seed_violation_catalogue(path='violations.json'):
+    """Κατάλογος τύπων παραβάσεων από το violations.json όταν ο πίνακας violations_data είναι άδειος"""
+    if ViolationsData.query.count():
+        return 0
+    with open(os.path.join(app.root_path, path), encoding='utf-8') as f:
+        entries = json.load(f)
+    created = 0
+    for entry in entries:
+        if not (entry.get('fine_cars') or '').strip():
+            continue
+        article = re.sub(r'[^\d]', '', entry.get('article') or '') or None
+        db.session.add(ViolationsData(
+            description=entry['description'].strip()[:200],
+            paragraph=(entry.get('paragraph') or '').strip() or None,
+            article=article,
+            article_paragraph=re.sub(r'[§\s]', '', entry.get('paragraph') or '') or None,
+            fine_cars=Decimal(entry['fine_cars']),
+            fine_motorcycles=Decimal(entry['fine_motorcycles']) if (entry.get('fine_motorcycles') or '').strip() else None,
+        ))
+        created += 1
+    db.session.commit()
+    invalidate_fine_tariff()
+    return created
+
+def seed_users(count, rng, password):
+    """Αστυνομικοί (μόνο ρόλος officer) με ονόματα seedNNNN. Επιστρέφει [(id, full_name)] όλων των ενεργών χρηστών"""
+    existing = set(db.session.scalars(db.select(User.username).where(User.username.like('seed%'))))
+    password_hash = generate_password_hash(password)
+    for n in range(1, count + 1):
+        username = f'seed{n:04d}'
+        if username in existing:
+            continue
+        db.session.add(User(
+            username=username,
+            email=f'{username}@seed.local',
+            password_hash=password_hash,
+            first_name=SEED_FIRST_NAMES[rng.integers(len(SEED_FIRST_NAMES))],
+            last_name=SEED_LAST_NAMES[rng.integers(len(SEED_LAST_NAMES))],
+            rank=SEED_RANKS[rng.integers(len(SEED_RANKS))],
+            role='officer',  # Ποτέ αυξημένα δικαιώματα για λογαριασμούς με γνωστό κωδικό
+        ))
+    db.session.commit()
+    return [(user.id, user.full_name) for user in User.query.filter_by(is_active=True).order_by(User.id)]
+
+def seed_violations(count, officer_ids, rng, days=365, batch_size=5000, progress=None):
+    """Παραβάσεις με ρεαλιστικές κατανομές (οδοί, ώρες, ημέρες, τύποι) και τις γραμμές violation_item τους"""
+    tariff = get_fine_tariff()
+    catalogue = sorted(tariff)
+    if not catalogue:
+        raise ValueError("Ο κατάλογος τύπων παραβάσεων (violations_data) είναι άδειος")
+    # Λίγοι τύποι (στάθμευση) κυριαρχούν· η σειρά δημοφιλίας ανακατεύεται ώστε να μην ακολουθεί τα ids
+    type_weights = _zipf_weights(len(catalogue))[rng.permutation(len(catalogue))]
+    street_weights = _zipf_weights(len(SEED_STREETS), 0.9)
+    officer_weights = _weights(rng.lognormal(0, 0.8, len(officer_ids)))
+    vehicle_types = [name for name, _ in SEED_VEHICLE_TYPES]
+    vehicle_weights = _weights([weight for _, weight in SEED_VEHICLE_TYPES])
+    today = datetime.now().date()
+    day_list = [today - timedelta(days=offset) for offset in range(days)]
+    day_weights = _weights([SEED_WEEKDAY_WEIGHTS[day.weekday()] for day in day_list])
+    hour_weights = _weights(SEED_HOUR_WEIGHTS)
+    # Υπότροποι: ένα μέρος των παραβάσεων αφορά ένα μικρό σύνολο πινακίδων
+    repeat_plates = [
+        f"{''.join(rng.choice(list(SEED_PLATE_LETTERS), 3))}-{rng.integers(1000, 10000)}"
+        for _ in range(max(count // 200, 10))
+    ]
+    
+    violation_table = Violation.__table__
+    item_table = ViolationItem.__table__
+    violation_columns = [
+        'id', 'license_plate', 'plate_key', 'vehicle_brand', 'vehicle_color', 'vehicle_type', 'violation_date',
+        'violation_time', 'street', 'street_number', 'selected_violations', 'violation_articles', 'total_fine_amount',
+        'plates_removed', 'license_removed', 'registration_removed', 'driver_last_name', 'driver_first_name',
+        'driver_father_name', 'driver_afm', 'officer_id', 'created_at', 'updated_at'
+    ]
+    item_columns = ['violation_id', 'violations_data_id', 'fine_amount', 'article']
+    next_id = (db.session.execute(db.select(func.max(Violation.id))).scalar() or 0) + 1
+    
+    created = 0
+    while created < count:
+        n = min(batch_size, count - created)
+        days_idx = rng.choice(days, n, p=day_weights)
+        seconds = rng.choice(24, n, p=hour_weights) * 3600 + rng.integers(0, 3600, n)
+        streets = rng.choice(len(SEED_STREETS), n, p=street_weights)
+        numbers = rng.integers(1, 200, n)
+        vehicles = rng.choice(len(vehicle_types), n, p=vehicle_weights)
+        brands = rng.integers(0, len(SEED_BRANDS), n)
+        colors = rng.integers(0, len(SEED_COLORS), n)
+        letters = rng.integers(0, len(SEED_PLATE_LETTERS), (n, 3))
+        digits = rng.integers(1000, 10000, n)
+        repeats = np.where(rng.random(n) < 0.15, rng.integers(0, len(repeat_plates), n), -1)
+        type_counts = rng.choice([1, 2, 3], n, p=[0.72, 0.21, 0.07])
+        types = rng.choice(len(catalogue), (n, 3), p=type_weights)
+        officers = rng.choice(len(officer_ids), n, p=officer_weights)
+        removals = rng.random((n, 3)) < [0.03, 0.01, 0.01]
+        drivers = rng.random(n) < 0.3
+        driver_names = rng.integers(0, 1 << 16, (n, 3))
+        afms = rng.integers(100000000, 1000000000, n)
+        
+        violation_rows = []
+        item_rows = []
+        for i in range(n):
+            violation_id = next_id + created + i
+            vehicle_type = vehicle_types[vehicles[i]]
+            klass = vehicle_class(vehicle_type)
+            if repeats[i] >= 0:
+                plate = repeat_plates[repeats[i]]
+            else:
+                plate = f"{''.join(SEED_PLATE_LETTERS[k] for k in letters[i])}-{digits[i]}"
+            selected = list(dict.fromkeys(catalogue[k] for k in types[i][:type_counts[i]]))
+            total_fine = 0
+            articles = []
+            for violations_data_id in selected:
+                entry = tariff[violations_data_id]
+                fine = entry['fines'][klass]
+                total_fine += fine
+                if entry['article']:
+                    articles.append(entry['article'])
+                item_rows.append((violation_id, violations_data_id, Decimal(str(fine)), entry['article']))
+            created_at = datetime.combine(day_list[days_idx[i]], datetime.min.time()) + timedelta(seconds=int(seconds[i]))
+            driver = drivers[i]
+            violation_rows.append((
+                violation_id, plate, normalize_plate(plate), SEED_BRANDS[brands[i]], SEED_COLORS[colors[i]],
+                vehicle_type, created_at.date(), created_at.time(), SEED_STREETS[streets[i]], str(numbers[i]),
+                json.dumps([str(violations_data_id) for violations_data_id in selected]),
+                json.dumps(articles) if articles else None,
+                Decimal(str(total_fine)) if total_fine > 0 else None,
+                bool(removals[i][0]), bool(removals[i][1]), bool(removals[i][2]),
+                SEED_LAST_NAMES[driver_names[i][0] % len(SEED_LAST_NAMES)] if driver else None,
+                SEED_FIRST_NAMES[driver_names[i][1] % len(SEED_FIRST_NAMES)] if driver else None,
+                SEED_FIRST_NAMES[driver_names[i][2] % len(SEED_FIRST_NAMES)] if driver else None,
+                str(afms[i]) if driver else None,
+                officer_ids[officers[i]], created_at, created_at
+            ))
+        
+        bulk_insert(violation_table, violation_columns, violation_rows)
+        bulk_insert(item_table, item_columns, item_rows)
+        db.session.commit()
+        created += n
+        if progress:
+            progress(created)
+    
+    _reset_sequence(violation_table)
+    db.session.commit()
+    return created
+
+def seed_messages(count, users, rng, days=365, batch_size=5000, mass_ratio=0.08):
+    """Μηνύματα (ένα μέρος μαζικά προς όλους) με παραλήπτες και τις αντίστοιχες ειδοποιήσεις"""
+    if len(users) < 2:
+        return 0, 0
+    user_ids = np.array([user_id for user_id, _ in users])
+    names = dict(users)
+    now = datetime.utcnow()
+    message_columns = ['id', 'sender_id', 'subject', 'content', 'created_at', 'is_mass_message']
+    recipient_columns = ['message_id', 'recipient_id', 'is_read', 'read_at']
+    notification_columns = ['user_id', 'title', 'message', 'type', 'is_read', 'related_message_id', 'created_at']
+    next_id = (db.session.execute(db.select(func.max(Message.id))).scalar() or 0) + 1
+    
+    message_rows, recipient_rows, notification_rows = [], [], []
+    deliveries = 0
+    for i in range(count):
+        message_id = next_id + i
+        sender_id = int(user_ids[rng.integers(len(user_ids))])
+        is_mass = rng.random() < mass_ratio
+        if is_mass:
+            recipients = user_ids[user_ids != sender_id]
+        else:
+            others = user_ids[user_ids != sender_id]
+            recipients = rng.choice(others, min(int(rng.integers(1, 4)), len(others)), replace=False)
+        subject = SEED_SUBJECTS[rng.integers(len(SEED_SUBJECTS))]
+        created_at = now - timedelta(seconds=int(rng.integers(0, days * 86400)))
+        message_rows.append((message_id, sender_id, subject, f"{subject}: παρακαλώ ενημερωθείτε.", created_at, is_mass))
+        
+        # Τα παλαιότερα μηνύματα έχουν σχεδόν όλα διαβαστεί
+        read_probability = 0.97 if now - created_at > timedelta(days=2) else 0.4
+        reads = rng.random(len(recipients)) < read_probability
+        text = f"Έχετε λάβει νέο μήνυμα από {names[sender_id]}: {subject}"
+        for recipient_id, is_read in zip(recipients.tolist(), reads.tolist()):
+            read_at = created_at + timedelta(minutes=int(rng.integers(1, 600))) if is_read else None
+            recipient_rows.append((message_id, recipient_id, is_read, read_at))
+            notification_rows.append((recipient_id, "Νέο Μήνυμα", text, 'message', is_read, message_id, created_at))
+        
+        if len(recipient_rows) >= batch_size or i == count - 1:
+            bulk_insert(Message.__table__, message_columns, message_rows)
+            bulk_insert(MessageRecipient.__table__, recipient_columns, recipient_rows)
+            bulk_insert(Notification.__table__, notification_columns, notification_rows)
+            db.session.commit()
+            deliveries += len(recipient_rows)
+            message_rows, recipient_rows, notification_rows = [], [], []
+    
+    # Οι ειδοποιήσεις υπάρχουν ήδη - το watermark συγχρονισμού ξεκινά μετά από αυτά τα μηνύματα
+    state_table = MessageSyncState.__table__
+    upsert = dialect_insert(state_table)
+    db.session.execute(upsert.on_conflict_do_update(
+        index_elements=[state_table.c.user_id],
+        set_={'last_message_id': upsert.excluded.last_message_id, 'updated_at': upsert.excluded.updated_at}
+    ), [{'user_id': int(user_id), 'last_message_id': next_id + count - 1, 'updated_at': now} for user_id in user_ids])
+    _reset_sequence(Message.__table__)
+    db.session.commit()
+    return count, deliveries
+
+# ======================== CLI COMMANDS ========================
+
+@app.cli.command('db-upgrade')
+@click.option('--status', is_flag=True, help='Μόνο εμφάνιση εφαρμοσμένων/εκκρεμών migrations')
+def db_upgrade_command(status):
+    """Εφαρμογή των εκκρεμών versioned migrations (migrations/)"""
+    import migrate_database
+    if status:
+        migrate_database.print_status(db.engine)
+    else:
+        migrate_database.upgrade(db)
+
+@app.cli.command('backfill-plate-keys')
+@click.option('--batch-size', default=1000, show_default=True, help='Γραμμές ανά batch')
+def backfill_plate_keys_command(batch_size):
+    """Επανυπολογισμός plate_key για όλες τις υπάρχουσες παραβάσεις"""
+    updated = backfill_plate_keys(batch_size=batch_size)
+    click.echo(f"✅ Ενημερώθηκαν {updated} παραβάσεις με plate_key")
+
+@app.cli.command('migrate-uploads')
+@click.option('--batch-size', default=200, show_default=True, help='Παραβάσεις ανά commit')
+def migrate_uploads_command(batch_size):
+    """Μεταφορά φωτογραφιών από το static/uploads στο blob store"""
+    migrated = missing = 0
+    last_id = 0
+    while True:
+        violations = Violation.query.options(db.load_only(Violation.id, Violation.photo_filename))\
+            .filter(Violation.id > last_id, Violation.photo_filename != None)\
+            .order_by(Violation.id).limit(batch_size).all()
+        if not violations:
+            break
+        for violation in violations:
+            last_id = violation.id
+            if blob_store.is_valid_key(violation.photo_filename):
+                continue
+            path = upload_path(violation.photo_filename)
+            if not os.path.exists(path):
+                missing += 1
+                continue
+            with open(path, 'rb') as f:
+                violation.photo_filename = blob_store.put_stream(_file_chunks(f), validate=_validate_photo)
+            try:
+                process_violation_photo(violation.photo_filename, app.config['PHOTO_MAX_DIMENSION'],
+                                        app.config['PHOTO_THUMBNAIL_SIZE'], app.config['PHOTO_WEBP_QUALITY'])
+            except Exception as e:
+                logger.warning(f"Αποτυχία επεξεργασίας φωτογραφίας {violation.photo_filename}: {str(e)}")
+            migrated += 1
+        db.session.commit()
+    click.echo(f"✅ Μεταφέρθηκαν {migrated} φωτογραφίες στο blob store")
+    if missing:
+        click.echo(f"⚠️ {missing} φωτογραφίες δεν βρέθηκαν στον δίσκο")
+
+@app.cli.command('migrate-signatures')
+@click.option('--batch-size', default=200, show_default=True, help='Γραμμές ανά batch')
+def migrate_signatures_command(batch_size):
+    """Μεταφορά των base64 υπογραφών οδηγών στο blob store"""
+    migrated = migrate_signatures(batch_size=batch_size)
+    click.echo(f"✅ Μεταφέρθηκαν {migrated} υπογραφές στο blob store")
+
+@app.cli.command('worker')
+@click.option('--once', is_flag=True, help='Εκτέλεση των εκκρεμών jobs και έξοδος')
+def worker_command(once):
+    """Job worker: notifications, επεξεργασία φωτογραφιών και rollup εκτός request"""
+    worker_id = job_worker_id('cli')
+    stop_event = threading.Event()
+    
+    def _stop(signum, frame):
+        stop_event.set()
+        job_wakeup.set()
+    signal.signal(signal.SIGTERM, _stop)
+    signal.signal(signal.SIGINT, _stop)
+    
+    lock = None
+    if db.engine.dialect.name == 'sqlite':
+        lock = _job_worker_lock(blocking=False)
+        if lock is None:
+            click.echo("⏳ Άλλος worker εκτελεί ήδη τα jobs της SQLite - αναμονή για το lock...")
+            lock = _job_worker_lock(blocking=True)
+    
+    click.echo(f"🚀 Job worker {worker_id} ξεκίνησε")
+    try:
+        processed = work_jobs(worker_id, stop_when_idle=once, stop_event=stop_event)
+    finally:
+        if lock is not None:
+            lock.close()
+    click.echo(f"✅ Job worker σταμάτησε ({processed} jobs ολοκληρώθηκαν)")
+
+@app.cli.command('reconcile-unread-counters')
+def reconcile_unread_counters_command():
+    """Επανυπολογισμός των μετρητών αδιάβαστων μηνυμάτων/ειδοποιήσεων από τους πίνακες"""
+    drifted = reconcile_unread_counters()
+    click.echo(f"✅ Οι μετρητές αδιάβαστων επανυπολογίστηκαν ({drifted} χρήστες είχαν απόκλιση)")
+
+@app.cli.command('seed')
+@click.option('--violations', default=100_000, show_default=True, help='Πλήθος παραβάσεων')
+@click.option('--users', default=50, show_default=True, help='Πλήθος αστυνομικών (seedNNNN)')
+@click.option('--messages', default=2_000, show_default=True, help='Πλήθος μηνυμάτων (μέρος τους μαζικά)')
+@click.option('--days', default=365, show_default=True, help='Χρονικό εύρος προς τα πίσω (ημέρες)')
+@click.option('--batch-size', default=5_000, show_default=True)
+@click.option('--random-seed', default=42, show_default=True, help='Ίδιο seed, ίδια δεδομένα')
+@click.option('--password', help='Κωδικός των χρηστών seedNNNN (προεπιλογή seed1234 μόνο στην SQLite)')
+@click.option('--allow-non-sqlite', is_flag=True, help='Να επιτρέπεται βάση εκτός SQLite (π.χ. PostgreSQL δοκιμών)')
+@click.option('--yes', is_flag=True, help='Χωρίς επιβεβαίωση')
+def seed_command(violations, users, messages, days, batch_size, random_seed, password, allow_non_sqlite, yes):
+    """Συνθετικά δεδομένα μεγάλης κλίμακας (χρήστες, παραβάσεις, μηνύματα, ειδοποιήσεις) για μετρήσεις απόδοσης"""
+    if db.engine.dialect.name != 'sqlite':
+        # Προστασία από seeding της παραγωγικής βάσης μέσω ενός ξεχασμένου DATABASE_URL
+        if not allow_non_sqlite:
+            raise click.UsageError(
+                f"Η βάση {db.engine.url.render_as_string(hide_password=True)} δεν είναι SQLite - "
+                f"χρησιμοποιήστε --allow-non-sqlite για βάση δοκιμών"
+            )
+        if not password:
+            raise click.UsageError("Εκτός SQLite απαιτείται ρητός --password για τους χρήστες seedNNNN")
+    password = password or 'seed1234'
+    if not yes:
+        click.confirm(f"Θα προστεθούν {violations} παραβάσεις και {messages} μηνύματα στη βάση "
+                      f"{db.engine.url.render_as_string(hide_password=True)}. Συνέχεια;", abort=True)
+    rng = np.random.default_rng(random_seed)
+    started = time.perf_counter()
+    
+    catalogue = seed_violation_catalogue()
+    if catalogue:
+        click.echo(f"✅ Κατάλογος τύπων παραβάσεων από το violations.json ({catalogue} τύποι)")
+    
+    all_users = seed_users(users, rng, password)
+    officer_ids = [user_id for user_id, _ in all_users]
+    click.echo(f"✅ Χρήστες: {len(all_users)} ενεργοί (κωδικός seedNNNN: {password})")
+    
+    def progress(created):
+        elapsed = time.perf_counter() - started
+        click.echo(f"🔄 Παραβάσεις: {created}/{violations} ({created / elapsed:.0f}/s)")
+    created = seed_violations(violations, officer_ids, rng, days=days, batch_size=batch_size, progress=progress)
+    click.echo(f"✅ Παραβάσεις: {created}")
+    
+    sent, deliveries = seed_messages(messages, all_users, rng, days=days, batch_size=batch_size)
+    click.echo(f"✅ Μηνύματα: {sent} ({deliveries} παραλήπτες και ειδοποιήσεις)")
+    
+    rows = rebuild_daily_stats()
+    reconcile_unread_counters()
+    if db.engine.dialect.name == 'postgresql':
+        db.session.execute(db.text('ANALYZE'))
+        db.session.commit()
+    click.echo(f"✅ Rollup ({rows} γραμμές) και μετρητές αδιάβαστων ενημερώθηκαν")
+    click.echo(f"🎉 Ολοκληρώθηκε σε {time.perf_counter() - started:.1f}s")
+
+@app.cli.command('rebuild-daily-stats')
+def rebuild_daily_stats_command():
+    """Ανακατασκευή του πίνακα violation_daily_stats από τις υπάρχουσες παραβάσεις"""
+    rows = rebuild_daily_stats()
+    click.echo(f"✅ Το rollup violation_daily_stats ανακατασκευάστηκε ({rows} γραμμές)")
+
 if __name__ == '__main__':
     app.run(debug=True, host='0.0.0.0', port=5000)
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark ταυτόχρονων εγγραφών: N παράλληλοι αστυνομικοί υποβάλλουν παραβάσεις μέσω /submit_violation
+
+Κάθε submitter είναι ξεχωριστό process (όπως οι gunicorn workers). Τρέχει σε προσωρινή βάση SQLite
+(ή στη βάση του --database-url) ώστε να ελέγχεται ότι με τα SQLITE_PRAGMAS (WAL, busy timeout)
+δεν εμφανίζεται "database is locked".
+
+Χρήση:
+    python benchmark_writes.py                         # 20 submitters x 10 υποβολές
+    python benchmark_writes.py --writers 20 --per-writer 25
+    python benchmark_writes.py --no-pragmas            # Σύγκριση με τις προεπιλογές της SQLite
+"""
+
+import os
+import sys
+import time
+import logging
+import argparse
+import tempfile
+import multiprocessing
+from decimal import Decimal
+
+
+class LockErrorCounter(logging.Handler):
+    """Μετράει τα logged σφάλματα κλειδώματος της βάσης (π.χ. από το submit_violation)
+
+    Ταιριάζει μόνο το μήνυμα σφάλματος της SQLite: τα logs αργών queries περιέχουν SQL με στήλες όπως locked_at.
+    """
+
+    LOCK_MESSAGES = ('database is locked', 'database table is locked')
+
+    def __init__(self):
+        super().__init__(logging.WARNING)
+        self.count = 0
+
+    def emit(self, record):
+        message = record.getMessage()
+        if any(lock_message in message for lock_message in self.LOCK_MESSAGES):
+            self.count += 1
+
+
+def seed(app_module, writers):
+    db = app_module.db
+    db.create_all()
+    db.session.add(app_module.ViolationsData(
+        description='Στάθμευση σε θέση ΑμεΑ', article='7', article_paragraph='2',
+        fine_cars=Decimal('80'), fine_motorcycles=Decimal('40')
+    ))
+    for i in range(writers):
+        user = app_module.User(
+            username=f'bench{i}', email=f'bench{i}@example.org', first_name='Bench', last_name=str(i),
+            rank='Αστυνομικός', role='admin' if i == 0 else 'officer'
+        )
+        user.set_password('bench')
+        db.session.add(user)
+    db.session.commit()
+
+
+def submitter(app_module, index, per_writer, results):
+    # Κάθε process ανοίγει τις δικές του συνδέσεις (όχι αυτές που κληρονόμησε από το fork)
+    with app_module.app.app_context():
+        app_module.db.engine.dispose(close=False)
+    lock_errors = LockErrorCounter()
+    logging.getLogger().addHandler(lock_errors)
+    client = app_module.app.test_client()
+    client.post('/login', data={'username': f'bench{index}', 'password': 'bench'})
+    latencies = []
+    for n in range(per_writer):
+        started = time.perf_counter()
+        client.post('/submit_violation', data={
+            'license_plate': f'ΒΝΚ-{index:02d}{n:02d}', 'vehicle_brand': 'Fiat', 'vehicle_color': 'Λευκό',
+            'vehicle_type': 'Επιβατικό', 'street': 'Ερμού', 'street_number': str(n + 1), 'violations': ['1']
+        })
+        latencies.append(time.perf_counter() - started)
+    results.put((latencies, lock_errors.count))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--writers', type=int, default=20)
+    parser.add_argument('--per-writer', type=int, default=10)
+    parser.add_argument('--database-url', help='Προεπιλογή: προσωρινό αρχείο SQLite')
+    parser.add_argument('--no-pragmas', action='store_true', help='Χωρίς τα SQLITE_PRAGMAS της εφαρμογής')
+    args = parser.parse_args()
+
+    database_file = None
+    if not args.database_url:
+        database_file = tempfile.mktemp(suffix='.db')
+        args.database_url = f'sqlite:///{database_file}'
+    os.environ['DATABASE_URL'] = args.database_url
+
+    import app as app_module
+    if args.no_pragmas:
+        app_module.app.config['SQLITE_PRAGMAS'] = {}
+    app_module.app.config['JOB_WORKER_EMBEDDED'] = False  # Μετράμε μόνο το request path
+
+    with app_module.app.app_context():
+        seed(app_module, args.writers)
+
+    print(f"🚀 {args.writers} submitters x {args.per_writer} υποβολές ({args.database_url})")
+    context = multiprocessing.get_context('fork')
+    results = context.Queue()
+    processes = [
+        context.Process(target=submitter, args=(app_module, i, args.per_writer, results))
+        for i in range(args.writers)
+    ]
+    started = time.perf_counter()
+    for process in processes:
+        process.start()
+    collected = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+    elapsed = time.perf_counter() - started
+
+    with app_module.app.app_context():
+        stored = app_module.Violation.query.count()
+    expected = args.writers * args.per_writer
+    lock_errors = sum(errors for _, errors in collected)
+    latencies = sorted(latency for values, _ in collected for latency in values)
+    p95 = latencies[int(len(latencies) * 0.95) - 1] if latencies else 0
+
+    print(f"📊 Παραβάσεις: {stored}/{expected} σε {elapsed:.2f}s ({expected / elapsed:.1f}/s), p95 {p95 * 1000:.0f}ms")
+    print(f"{'✅' if lock_errors == 0 else '❌'} Σφάλματα κλειδώματος: {lock_errors}")
+
+    if database_file:
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(database_file + suffix):
+                os.remove(database_file + suffix)
+    return stored == expected and lock_errors == 0
+
+
+if __name__ == '__main__':
+    sys.exit(0 if main() else 1)
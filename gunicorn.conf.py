@@ -0,0 +1,28 @@
+# Gunicorn configuration (φορτώνεται αυτόματα από το `gunicorn app:app`)
+import os
+
+# Threaded workers ώστε τα long-lived SSE streams (/api/stream) να μη δεσμεύουν ολόκληρο worker.
+# Κάθε ανοιχτό stream κρατά ένα thread: έως SSE_MAX_STREAMS (προεπιλογή 8) ανά worker, οι υπόλοιπες καρτέλες
+# κάνουν polling. Τα threads πρέπει να είναι αρκετά περισσότερα από το SSE_MAX_STREAMS για τα κανονικά requests
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread')
+workers = int(os.environ.get('WEB_CONCURRENCY', 2))
+threads = int(os.environ.get('GUNICORN_THREADS', 24))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 120))
+
+# Prometheus multiprocess: κοινός κατάλογος metrics για όλους τους workers (βλ. /metrics στο app.py)
+metrics_dir = os.environ.setdefault(
+    'PROMETHEUS_MULTIPROC_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'instance', 'metrics')
+)
+
+
+def on_starting(server):
+    """Καθαρισμός των metrics της προηγούμενης εκτέλεσης πριν ξεκινήσουν οι workers"""
+    os.makedirs(metrics_dir, exist_ok=True)
+    for name in os.listdir(metrics_dir):
+        if name.endswith('.db'):
+            os.remove(os.path.join(metrics_dir, name))
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
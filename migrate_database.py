@@ -1,116 +1,235 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 """
-Migration Script: Προσθήκη στήλης related_message_id στον πίνακα notification
-Ημερομηνία: 02/10/2025
-Περιγραφή: Προσθήκη στήλης για σύνδεση ειδοποιήσεων με μηνύματα
+Versioned Migration Runner για SQLite και PostgreSQL
+
+Κάθε migration είναι ένα αρχείο migrations/NNNN_<όνομα>.py με συνάρτηση upgrade(op).
+Οι εφαρμοσμένες εκδόσεις καταγράφονται στον πίνακα schema_migrations.
+
+Χρήση:
+    python migrate_database.py            # Εφαρμογή εκκρεμών migrations
+    python migrate_database.py --status   # Εμφάνιση κατάστασης
+    flask db-upgrade                      # Το ίδιο μέσω Flask CLI
 """
 
-import sqlite3
 import os
+import re
 import sys
+import sqlite3
+import importlib.util
 from datetime import datetime
 
-# Διαδρομή της βάσης δεδομένων
-DB_PATH = 'instance/municipal_police_v3.db'
-
-def backup_database():
-    """Δημιουργία αντιγράφου ασφαλείας της βάσης δεδομένων"""
-    if os.path.exists(DB_PATH):
-        backup_name = f"instance/municipal_police_v3_backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}.db"
-        import shutil
-        shutil.copy2(DB_PATH, backup_name)
-        print(f"✅ Αντίγραφο ασφαλείας δημιουργήθηκε: {backup_name}")
-        return backup_name
-    else:
-        print(f"❌ Η βάση δεδομένων δεν βρέθηκε στη διαδρομή: {DB_PATH}")
+from sqlalchemy import MetaData, Table, Column, String, DateTime, inspect, text
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'migrations')
+MIGRATION_FILE_PATTERN = re.compile(r'^(\d{4})_(\w+)\.py$')
+
+# Αυθαίρετο σταθερό κλειδί για pg_advisory_lock ώστε να μην τρέχουν δύο runners ταυτόχρονα
+ADVISORY_LOCK_KEY = 7351
+
+schema_metadata = MetaData()
+schema_migrations = Table(
+    'schema_migrations', schema_metadata,
+    Column('version', String(10), primary_key=True),
+    Column('name', String(200), nullable=False),
+    Column('applied_at', DateTime, nullable=False),
+)
+
+
+class MigrationOperations:
+    """Βοηθητικές λειτουργίες που λαμβάνει κάθε migration ως `op`"""
+
+    def __init__(self, conn, transactional):
+        self.conn = conn
+        self.dialect = conn.dialect.name
+        self.transactional = transactional
+
+    @property
+    def is_postgresql(self):
+        return self.dialect == 'postgresql'
+
+    @property
+    def is_sqlite(self):
+        return self.dialect == 'sqlite'
+
+    def execute(self, sql, params=None):
+        return self.conn.execute(text(sql), params or {})
+
+    def has_table(self, table_name):
+        return inspect(self.conn).has_table(table_name)
+
+    def has_column(self, table_name, column_name):
+        return column_name in [c['name'] for c in inspect(self.conn).get_columns(table_name)]
+
+    def add_column(self, table_name, column_name, column_ddl):
+        """ALTER TABLE ... ADD COLUMN μόνο αν δεν υπάρχει ήδη η στήλη"""
+        if not self.has_column(table_name, column_name):
+            self.execute(f'ALTER TABLE {table_name} ADD COLUMN {column_name} {column_ddl}')
+
+    def create_table(self, table):
+        """Δημιουργία πίνακα (και των indexes του) από τον ορισμό Table του migration αν δεν υπάρχει
+
+        Τα migrations ορίζουν τους πίνακές τους αυτόνομα (όχι με import από το app), ώστε να μην αλλάζουν
+        νόημα όταν αλλάζουν αργότερα τα models.
+        """
+        table.create(self.conn, checkfirst=True)
+
+    def create_index(self, name, table_name, columns, using=None):
+        """CREATE INDEX IF NOT EXISTS - CONCURRENTLY στην PostgreSQL όταν το migration δεν είναι transactional"""
+        concurrently = self.is_postgresql and not self.transactional
+        if concurrently:
+            # Ένα αποτυχημένο CREATE INDEX CONCURRENTLY αφήνει INVALID index που το IF NOT EXISTS θα προσπερνούσε
+            invalid = self.execute(
+                "SELECT 1 FROM pg_class c JOIN pg_index i ON i.indexrelid = c.oid "
+                "WHERE c.relname = :name AND NOT i.indisvalid",
+                {'name': name}
+            ).first()
+            if invalid:
+                self.execute(f'DROP INDEX CONCURRENTLY IF EXISTS {name}')
+
+        using_sql = f' USING {using}' if using and self.is_postgresql else ''
+        self.execute(
+            f"CREATE INDEX {'CONCURRENTLY ' if concurrently else ''}IF NOT EXISTS {name} "
+            f"ON {table_name}{using_sql} ({', '.join(columns)})"
+        )
+
+
+def discover_migrations():
+    """Λίστα (version, name, path) ταξινομημένη κατά version"""
+    migrations = []
+    for filename in sorted(os.listdir(MIGRATIONS_DIR)):
+        match = MIGRATION_FILE_PATTERN.match(filename)
+        if match:
+            migrations.append((match.group(1), match.group(2), os.path.join(MIGRATIONS_DIR, filename)))
+    return migrations
+
+
+def load_migration(version, name, path):
+    spec = importlib.util.spec_from_file_location(f'migration_{version}_{name}', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def applied_versions(engine):
+    schema_metadata.create_all(engine, checkfirst=True)
+    with engine.connect() as conn:
+        return {row.version for row in conn.execute(schema_migrations.select())}
+
+
+def pending_migrations(engine):
+    applied = applied_versions(engine)
+    return [migration for migration in discover_migrations() if migration[0] not in applied]
+
+
+def backup_sqlite_database(engine):
+    """Αντίγραφο ασφαλείας του αρχείου SQLite πριν από την εφαρμογή migrations"""
+    db_path = engine.url.database
+    if engine.dialect.name != 'sqlite' or not db_path or db_path == ':memory:' or not os.path.exists(db_path):
         return None
+    root, ext = os.path.splitext(db_path)
+    backup_name = f"{root}_backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}{ext}"
+    # Backup API αντί για αντιγραφή αρχείου: σε WAL mode μέρος των δεδομένων βρίσκεται ακόμη στο -wal
+    source, target = sqlite3.connect(db_path), sqlite3.connect(backup_name)
+    try:
+        source.backup(target)
+    finally:
+        target.close()
+        source.close()
+    print(f"✅ Αντίγραφο ασφαλείας δημιουργήθηκε: {backup_name}")
+    return backup_name
+
+
+# Οι πίνακες του αρχικού σχήματος - όλοι οι μεταγενέστεροι δημιουργούνται από το migration τους
+BASELINE_TABLES = (
+    'user', 'message', 'message_recipient', 'dynamic_field', 'violations_data', 'violation', 'notification'
+)
+
 
-def check_column_exists(cursor, table_name, column_name):
-    """Έλεγχος αν υπάρχει η στήλη στον πίνακα"""
-    cursor.execute(f"PRAGMA table_info({table_name})")
-    columns = cursor.fetchall()
-    column_names = [column[1] for column in columns]
-    return column_name in column_names
+def apply_baseline(db):
+    """Βασικό σχήμα: πίνακες του αρχικού σχήματος που λείπουν και η παλιά στήλη notification.related_message_id"""
+    db.metadata.create_all(db.engine, tables=[db.metadata.tables[name] for name in BASELINE_TABLES])
+    with db.engine.begin() as conn:
+        op = MigrationOperations(conn, transactional=True)
+        op.add_column('notification', 'related_message_id', 'INTEGER')
+
+
+def apply_migration(engine, version, name, path):
+    module = load_migration(version, name, path)
+    transactional = getattr(module, 'TRANSACTIONAL', True)
+    description = (module.__doc__ or '').strip().splitlines()
+    print(f"🔄 {version}_{name}: {description[0] if description else ''}")
+
+    if transactional or engine.dialect.name != 'postgresql':
+        with engine.begin() as conn:
+            module.upgrade(MigrationOperations(conn, transactional=True))
+            conn.execute(schema_migrations.insert().values(
+                version=version, name=name, applied_at=datetime.utcnow()
+            ))
+    else:
+        # CREATE INDEX CONCURRENTLY δεν επιτρέπεται μέσα σε transaction
+        with engine.connect().execution_options(isolation_level='AUTOCOMMIT') as conn:
+            module.upgrade(MigrationOperations(conn, transactional=False))
+            conn.execute(schema_migrations.insert().values(
+                version=version, name=name, applied_at=datetime.utcnow()
+            ))
+    print(f"✅ {version}_{name} εφαρμόστηκε")
+
+
+def upgrade(db):
+    """Εφαρμογή baseline και όλων των εκκρεμών migrations. Επιστρέφει τις εκδόσεις που εφαρμόστηκαν"""
+    engine = db.engine
+    lock_conn = None
+    if engine.dialect.name == 'postgresql':
+        lock_conn = engine.connect().execution_options(isolation_level='AUTOCOMMIT')
+        lock_conn.execute(text('SELECT pg_advisory_lock(:key)'), {'key': ADVISORY_LOCK_KEY})
 
-def add_related_message_id_column():
-    """Προσθήκη της στήλης related_message_id στον πίνακα notification"""
-    
     try:
-        # Δημιουργία αντιγράφου ασφαλείας
-        backup_file = backup_database()
-        if not backup_file:
-            return False
-            
-        # Σύνδεση με τη βάση δεδομένων
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        
-        # Έλεγχος αν υπάρχει ήδη η στήλη
-        if check_column_exists(cursor, 'notification', 'related_message_id'):
-            print("✅ Η στήλη 'related_message_id' υπάρχει ήδη στον πίνακα 'notification'")
-            conn.close()
-            return True
-            
-        print("🔄 Προσθήκη στήλης 'related_message_id' στον πίνακα 'notification'...")
-        
-        # Προσθήκη της νέας στήλης
-        cursor.execute("""
-            ALTER TABLE notification 
-            ADD COLUMN related_message_id INTEGER
-        """)
-        
-        print("✅ Η στήλη 'related_message_id' προστέθηκε επιτυχώς!")
-        
-        # Έλεγχος αν υπάρχει ο πίνακας message για το foreign key
-        cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='message'")
-        if cursor.fetchone():
-            print("📋 Ο πίνακας 'message' βρέθηκε - το foreign key constraint θα δημιουργηθεί αυτόματα από τη SQLAlchemy")
-        else:
-            print("⚠️  Ο πίνακας 'message' δεν βρέθηκε - θα πρέπει να δημιουργηθεί πρώτα")
-        
-        # Commit των αλλαγών
-        conn.commit()
-        
-        # Έλεγχος της νέας δομής
-        print("\n📊 Νέα δομή πίνακα 'notification':")
-        cursor.execute("PRAGMA table_info(notification)")
-        columns = cursor.fetchall()
-        for column in columns:
-            print(f"  - {column[1]} ({column[2]})")
-            
-        conn.close()
-        print(f"\n✅ Migration ολοκληρώθηκε επιτυχώς!")
-        print(f"📁 Αντίγραφο ασφαλείας: {backup_file}")
-        return True
-        
-    except Exception as e:
-        print(f"❌ Σφάλμα κατά το migration: {str(e)}")
-        if 'conn' in locals():
-            conn.rollback()
-            conn.close()
-        return False
+        pending = pending_migrations(engine)
+        if pending:
+            backup_sqlite_database(engine)
+        apply_baseline(db)
+
+        for version, name, path in pending:
+            apply_migration(engine, version, name, path)
+
+        if not pending:
+            print("✅ Η βάση δεδομένων είναι ενημερωμένη - δεν υπάρχουν εκκρεμή migrations")
+        return [version for version, _, _ in pending]
+    finally:
+        if lock_conn is not None:
+            lock_conn.execute(text('SELECT pg_advisory_unlock(:key)'), {'key': ADVISORY_LOCK_KEY})
+            lock_conn.close()
+
+
+def print_status(engine):
+    applied = applied_versions(engine)
+    print("📋 Migrations:")
+    for version, name, _ in discover_migrations():
+        print(f"  {'✅' if version in applied else '⏳'} {version}_{name}")
+
 
 def main():
     """Κύρια function"""
+    from app import app, db
+
     print("🚀 Έναρξη Database Migration")
     print("=" * 50)
-    
-    if not os.path.exists(DB_PATH):
-        print(f"❌ Η βάση δεδομένων δεν βρέθηκε στη διαδρομή: {DB_PATH}")
-        print("💡 Βεβαιωθείτε ότι βρίσκεστε στο root directory της εφαρμογής")
-        return False
-    
-    success = add_related_message_id_column()
-    
-    if success:
-        print("\n🎉 Migration ολοκληρώθηκε με επιτυχία!")
-        print("📋 Τώρα μπορείτε να επανεκκινήσετε την εφαρμογή σας")
-    else:
-        print("\n💥 Migration απέτυχε!")
-        print("🔧 Παρακαλώ ελέγξτε τα σφάλματα παραπάνω")
-    
-    return success
+
+    with app.app_context():
+        if '--status' in sys.argv[1:]:
+            print_status(db.engine)
+            return True
+        try:
+            upgrade(db)
+        except Exception as e:
+            print(f"\n💥 Migration απέτυχε: {str(e)}")
+            print("🔧 Παρακαλώ ελέγξτε τα σφάλματα παραπάνω")
+            return False
+
+    print("\n🎉 Migration ολοκληρώθηκε με επιτυχία!")
+    return True
+
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(0 if main() else 1)
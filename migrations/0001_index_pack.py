@@ -0,0 +1,21 @@
+"""Index pack για τα hot predicates (violation, notification, message_recipient, dynamic_field)"""
+
+# Στην PostgreSQL τα indexes χτίζονται με CREATE INDEX CONCURRENTLY (χωρίς transaction)
+TRANSACTIONAL = False
+
+INDEXES = [
+    ('ix_violation_officer_id_violation_date', 'violation', ['officer_id', 'violation_date']),
+    ('ix_violation_violation_date', 'violation', ['violation_date']),
+    ('ix_violation_created_at', 'violation', ['created_at']),
+    ('ix_notification_user_id_is_read_created_at', 'notification', ['user_id', 'is_read', 'created_at']),
+    ('ix_notification_user_id_related_message_id', 'notification', ['user_id', 'related_message_id']),
+    ('ix_message_recipient_recipient_id_is_read', 'message_recipient', ['recipient_id', 'is_read']),
+    ('ix_message_recipient_message_id', 'message_recipient', ['message_id']),
+    ('ix_message_sender_id_created_at', 'message', ['sender_id', 'created_at']),
+    ('ix_dynamic_field_field_type_is_active', 'dynamic_field', ['field_type', 'is_active']),
+]
+
+
+def upgrade(op):
+    for name, table_name, columns in INDEXES:
+        op.create_index(name, table_name, columns)
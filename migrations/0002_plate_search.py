@@ -0,0 +1,60 @@
+"""Στήλη violation.plate_key με B-tree index και trigram αναζήτηση (pg_trgm / FTS5)"""
+
+import re
+
+from sqlalchemy import text
+
+TRANSACTIONAL = False
+
+PLATE_FTS_TABLE = 'violation_plate_fts'
+BATCH_SIZE = 1000
+
+
+def normalize_plate(license_plate):
+    """Κανονικοποίηση πινακίδας όπως ορίστηκε σε αυτή την έκδοση: μόνο γράμματα/αριθμοί, κεφαλαία"""
+    return re.sub(r'[^\w\u0370-\u03FF]', '', license_plate or '').upper()
+
+
+def backfill_plate_keys(op):
+    last_id = 0
+    while True:
+        rows = op.execute(
+            "SELECT id, license_plate FROM violation WHERE id > :last_id ORDER BY id LIMIT :limit",
+            {'last_id': last_id, 'limit': BATCH_SIZE}
+        ).all()
+        if not rows:
+            break
+        op.conn.execute(text("UPDATE violation SET plate_key = :plate_key WHERE id = :id"), [
+            {'id': row.id, 'plate_key': normalize_plate(row.license_plate)} for row in rows
+        ])
+        last_id = rows[-1].id
+
+
+def upgrade(op):
+    op.add_column('violation', 'plate_key', 'VARCHAR(20)')
+    backfill_plate_keys(op)
+    op.create_index('ix_violation_plate_key', 'violation', ['plate_key'])
+
+    if op.is_postgresql:
+        op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        op.create_index('ix_violation_plate_key_trgm', 'violation', ['plate_key gin_trgm_ops'], using='gin')
+    elif op.is_sqlite and not op.has_table(PLATE_FTS_TABLE):
+        # External-content FTS5 πίνακας με trigram tokenizer, συγχρονισμένος μέσω triggers
+        op.execute(
+            f"CREATE VIRTUAL TABLE {PLATE_FTS_TABLE} "
+            f"USING fts5(plate_key, content='violation', content_rowid='id', tokenize='trigram')"
+        )
+        op.execute(f"INSERT INTO {PLATE_FTS_TABLE}({PLATE_FTS_TABLE}) VALUES ('rebuild')")
+        op.execute(
+            f"CREATE TRIGGER IF NOT EXISTS violation_plate_fts_ai AFTER INSERT ON violation BEGIN "
+            f"INSERT INTO {PLATE_FTS_TABLE}(rowid, plate_key) VALUES (new.id, new.plate_key); END"
+        )
+        op.execute(
+            f"CREATE TRIGGER IF NOT EXISTS violation_plate_fts_ad AFTER DELETE ON violation BEGIN "
+            f"INSERT INTO {PLATE_FTS_TABLE}({PLATE_FTS_TABLE}, rowid, plate_key) VALUES ('delete', old.id, old.plate_key); END"
+        )
+        op.execute(
+            f"CREATE TRIGGER IF NOT EXISTS violation_plate_fts_au AFTER UPDATE OF plate_key ON violation BEGIN "
+            f"INSERT INTO {PLATE_FTS_TABLE}({PLATE_FTS_TABLE}, rowid, plate_key) VALUES ('delete', old.id, old.plate_key); "
+            f"INSERT INTO {PLATE_FTS_TABLE}(rowid, plate_key) VALUES (new.id, new.plate_key); END"
+        )
@@ -0,0 +1,32 @@
+"""Πίνακας violation_daily_stats (rollup ανά ημέρα/αστυνομικό) και αρχική συμπλήρωσή του"""
+
+from sqlalchemy import MetaData, Table, Column, Integer, Date, DateTime, Numeric, ForeignKey
+
+metadata = MetaData()
+Table('user', metadata, Column('id', Integer, primary_key=True))
+violation_daily_stats = Table(
+    'violation_daily_stats', metadata,
+    Column('stat_date', Date, primary_key=True),
+    Column('officer_id', Integer, ForeignKey('user.id'), primary_key=True, index=True),
+    Column('violations_count', Integer, nullable=False),
+    Column('with_photos_count', Integer, nullable=False),
+    Column('plates_removed_count', Integer, nullable=False),
+    Column('removals_count', Integer, nullable=False),
+    Column('total_fine', Numeric(12, 2), nullable=False),
+    Column('updated_at', DateTime),
+)
+
+
+def upgrade(op):
+    op.create_table(violation_daily_stats)
+    if op.execute("SELECT COUNT(*) FROM violation_daily_stats").scalar() == 0:
+        op.execute(
+            "INSERT INTO violation_daily_stats (stat_date, officer_id, violations_count, with_photos_count, "
+            "plates_removed_count, removals_count, total_fine, updated_at) "
+            "SELECT violation_date, officer_id, COUNT(id), "
+            "SUM(CASE WHEN photo_filename IS NOT NULL THEN 1 ELSE 0 END), "
+            "SUM(CASE WHEN plates_removed THEN 1 ELSE 0 END), "
+            "SUM(CASE WHEN plates_removed OR license_removed OR registration_removed THEN 1 ELSE 0 END), "
+            "COALESCE(SUM(total_fine_amount), 0), MAX(COALESCE(updated_at, created_at)) "
+            "FROM violation GROUP BY violation_date, officer_id"
+        )
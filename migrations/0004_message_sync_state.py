@@ -0,0 +1,16 @@
+"""Πίνακας message_sync_state (watermark συγχρονισμού ειδοποιήσεων μηνυμάτων)"""
+
+from sqlalchemy import MetaData, Table, Column, Integer, DateTime, ForeignKey
+
+metadata = MetaData()
+Table('user', metadata, Column('id', Integer, primary_key=True))
+message_sync_state = Table(
+    'message_sync_state', metadata,
+    Column('user_id', Integer, ForeignKey('user.id'), primary_key=True),
+    Column('last_message_id', Integer, nullable=False),
+    Column('updated_at', DateTime),
+)
+
+
+def upgrade(op):
+    op.create_table(message_sync_state)
@@ -0,0 +1,8 @@
+"""Indexes (φίλτρο, id) για το keyset pagination εισερχομένων/απεσταλμένων μηνυμάτων"""
+
+TRANSACTIONAL = False
+
+
+def upgrade(op):
+    op.create_index('ix_message_recipient_recipient_id_id', 'message_recipient', ['recipient_id', 'id'])
+    op.create_index('ix_message_sender_id_id', 'message', ['sender_id', 'id'])
@@ -0,0 +1,73 @@
+"""Υπογραφές οδηγών από base64 στη violation.driver_signature σε συμπιεσμένα PNG στο blob store"""
+
+import os
+import io
+import base64
+import hashlib
+import logging
+
+from flask import current_app
+from PIL import Image
+from sqlalchemy import text
+
+BATCH_SIZE = 200
+
+logger = logging.getLogger(__name__)
+
+
+def compact_signature_png(data_url):
+    """Base64 PNG από το canvas -> συμπιεσμένο PNG κλίμακας του γκρι με alpha. None αν δεν είναι έγκυρο"""
+    try:
+        raw = base64.b64decode(data_url.split(',', 1)[-1], validate=True)
+        with Image.open(io.BytesIO(raw)) as img:
+            if img.format != 'PNG':
+                return None
+            signature = img.convert('LA')
+    except Exception:
+        return None
+    buffer = io.BytesIO()
+    signature.save(buffer, 'PNG', optimize=True)
+    return buffer.getvalue()
+
+
+def store_blob(root, data, suffix):
+    """Content-addressed εγγραφή με τη διάταξη του local blob store: <root>/ab/cd/<sha256><suffix>"""
+    key = f'{hashlib.sha256(data).hexdigest()}{suffix}'
+    path = os.path.join(root, key[:2], key[2:4], key)
+    if not os.path.exists(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        staging_path = f'{path}.{os.getpid()}.part'
+        with open(staging_path, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(staging_path, path)
+    return key
+
+
+def upgrade(op):
+    op.add_column('violation', 'driver_signature_key', 'VARCHAR(80)')
+
+    root = current_app.config.get('BLOB_STORE_ROOT') or os.path.join(current_app.instance_path, 'blobs')
+    last_id = 0
+    while True:
+        rows = op.execute(
+            "SELECT id, driver_signature FROM violation WHERE id > :last_id AND driver_signature IS NOT NULL "
+            "ORDER BY id LIMIT :limit",
+            {'last_id': last_id, 'limit': BATCH_SIZE}
+        ).all()
+        if not rows:
+            break
+
+        params = []
+        for row in rows:
+            png = compact_signature_png(row.driver_signature)
+            if png is None:
+                logger.warning(f"Μη έγκυρη υπογραφή στην παράβαση {row.id} - παραμένει ως έχει")
+                continue
+            params.append({'id': row.id, 'key': store_blob(root, png, '.png')})
+        if params:
+            op.conn.execute(text(
+                "UPDATE violation SET driver_signature_key = :key, driver_signature = NULL WHERE id = :id"
+            ), params)
+        last_id = rows[-1].id
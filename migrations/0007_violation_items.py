@@ -0,0 +1,98 @@
+"""Πίνακας violation_item (μία γραμμή ανά τύπο παράβασης) με backfill από το JSON selected_violations"""
+
+import json
+from decimal import Decimal
+
+from sqlalchemy import MetaData, Table, Column, Index, Integer, String, Numeric, ForeignKey
+
+BATCH_SIZE = 500
+
+metadata = MetaData()
+Table('violation', metadata, Column('id', Integer, primary_key=True))
+Table('violations_data', metadata, Column('id', Integer, primary_key=True))
+violation_item = Table(
+    'violation_item', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('violation_id', Integer, ForeignKey('violation.id', ondelete='CASCADE'), nullable=False, index=True),
+    Column('violations_data_id', Integer, ForeignKey('violations_data.id', ondelete='SET NULL'), nullable=True),
+    Column('fine_amount', Numeric(8, 2), nullable=False),
+    Column('article', String(60), nullable=True, index=True),
+    Index('ix_violation_item_data_violation', 'violations_data_id', 'violation_id'),
+)
+
+VEHICLE_CLASS_MAP = {
+    'αυτοκίνητο': 'car', 'αυτοκινητο': 'car', 'car': 'car', 'automobile': 'car',
+    'μοτοσικλέτα': 'motorcycle', 'μοτοσικλετα': 'motorcycle', 'motorcycle': 'motorcycle', 'bike': 'motorcycle',
+    'φορτηγό': 'truck', 'φορτηγο': 'truck', 'truck': 'truck',
+}
+
+
+def to_decimal(value):
+    return Decimal(str(value)) if value else Decimal('0')
+
+
+def tariff_entry(row):
+    """Άρθρο και πρόστιμα ανά κατηγορία οχήματος, με τους κανόνες του πίνακα προστίμων αυτής της έκδοσης"""
+    fine_cars = to_decimal(row.fine_cars)
+    fine_motorcycles = to_decimal(row.fine_motorcycles) if row.fine_motorcycles else fine_cars
+    if row.fine_motorcycles and row.half_fine_motorcycles:
+        fine_motorcycles = fine_motorcycles / 2
+    article = None
+    if row.article and row.article.strip():
+        article = row.article.strip()
+        if row.article_paragraph and row.article_paragraph.strip():
+            article += f" παρ. {row.article_paragraph.strip()}"
+    return {
+        'article': article,
+        'fines': {
+            'car': fine_cars,
+            'motorcycle': fine_motorcycles,
+            'truck': to_decimal(row.fine_trucks) if row.fine_trucks else fine_cars,
+        },
+    }
+
+
+def backfill_violation_items(op):
+    """Γραμμές από το JSON selected_violations, με πρόστιμα από τον τρέχοντα πίνακα προστίμων"""
+    tariff = {
+        row.id: tariff_entry(row) for row in op.execute(
+            "SELECT id, fine_cars, fine_motorcycles, fine_trucks, half_fine_motorcycles, article, article_paragraph "
+            "FROM violations_data"
+        )
+    }
+    last_id = 0
+    while True:
+        rows = op.execute(
+            "SELECT v.id, v.selected_violations, v.vehicle_type FROM violation v WHERE v.id > :last_id "
+            "AND NOT EXISTS (SELECT 1 FROM violation_item i WHERE i.violation_id = v.id) ORDER BY v.id LIMIT :limit",
+            {'last_id': last_id, 'limit': BATCH_SIZE}
+        ).all()
+        if not rows:
+            break
+
+        params = []
+        for row in rows:
+            try:
+                selected = json.loads(row.selected_violations or '[]')
+            except (TypeError, ValueError):
+                selected = []
+            klass = VEHICLE_CLASS_MAP.get((row.vehicle_type or '').lower(), 'car')
+            for violation_id in selected:
+                try:
+                    entry = tariff.get(int(violation_id))
+                except (ValueError, TypeError):
+                    continue
+                params.append({
+                    'violation_id': row.id,
+                    'violations_data_id': int(violation_id) if entry else None,  # Τύπος που έχει διαγραφεί
+                    'fine_amount': entry['fines'][klass] if entry else Decimal('0'),
+                    'article': entry['article'] if entry else None,
+                })
+        if params:
+            op.conn.execute(violation_item.insert(), params)
+        last_id = rows[-1].id
+
+
+def upgrade(op):
+    op.create_table(violation_item)
+    backfill_violation_items(op)
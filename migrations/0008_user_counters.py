@@ -0,0 +1,28 @@
+"""Πίνακας user_counter (μετρητές αδιάβαστων μηνυμάτων/ειδοποιήσεων ανά χρήστη) και αρχική συμπλήρωσή του"""
+
+from datetime import datetime
+
+from sqlalchemy import MetaData, Table, Column, Integer, DateTime, ForeignKey
+
+metadata = MetaData()
+Table('user', metadata, Column('id', Integer, primary_key=True))
+user_counter = Table(
+    'user_counter', metadata,
+    Column('user_id', Integer, ForeignKey('user.id'), primary_key=True),
+    Column('unread_messages', Integer, nullable=False),
+    Column('unread_notifications', Integer, nullable=False),
+    Column('updated_at', DateTime),
+)
+
+
+def upgrade(op):
+    op.create_table(user_counter)
+    op.execute("DELETE FROM user_counter")
+    op.execute(
+        'INSERT INTO user_counter (user_id, unread_messages, unread_notifications, updated_at) '
+        'SELECT u.id, '
+        '(SELECT COUNT(*) FROM message_recipient mr WHERE mr.recipient_id = u.id AND NOT mr.is_read), '
+        '(SELECT COUNT(*) FROM notification n WHERE n.user_id = u.id AND NOT n.is_read), '
+        ':now FROM "user" u',
+        {'now': datetime.utcnow()}
+    )
@@ -0,0 +1,24 @@
+"""Πίνακας job (ουρά εργασιών παρασκηνίου για τον `flask worker`)"""
+
+from sqlalchemy import MetaData, Table, Column, Index, Integer, String, Text, DateTime
+
+metadata = MetaData()
+job = Table(
+    'job', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('task', String(60), nullable=False),
+    Column('payload', Text, nullable=False),
+    Column('status', String(20), nullable=False),
+    Column('attempts', Integer, nullable=False),
+    Column('run_after', DateTime, nullable=False),
+    Column('locked_at', DateTime),
+    Column('locked_by', String(120)),
+    Column('last_error', Text),
+    Column('created_at', DateTime),
+    Column('finished_at', DateTime),
+    Index('ix_job_status_run_after_id', 'status', 'run_after', 'id'),
+)
+
+
+def upgrade(op):
+    op.create_table(job)